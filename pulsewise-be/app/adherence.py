@@ -0,0 +1,114 @@
+"""Medication adherence: logged doses vs doses the schedules planned.
+
+Logged outcomes come from ``medication_adherence_daily``, which triggers on
+``medication_logs`` keep current (migration 0005); planned doses are
+expanded from the schedules with :mod:`app.schedules`. A report therefore
+costs O(days in range) per medication and never reads the logs.
+"""
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Sequence
+from zoneinfo import ZoneInfo
+
+from . import schedules
+
+# A dose taken up to this long after planned_at is on time; a planned dose
+# with no log once this has passed is missed. Must match migration 0005.
+ON_TIME_MIN = 60
+COUNTERS = ("on_time", "late", "skipped", "unscheduled")
+
+
+def _local_bounds(day_from: date, day_to: date, tz: ZoneInfo):
+    start = datetime.combine(day_from, time(), tz).astimezone(timezone.utc)
+    end = datetime.combine(day_to + timedelta(days=1), time(), tz)
+    return start, end.astimezone(timezone.utc)
+
+
+def planned_doses(
+    med, scs: Iterable, date_from: date, date_to: date, due_by: datetime
+) -> tuple[Counter, Counter]:
+    """Planned and already-due (planned before ``due_by``) doses of one
+    medication per local day. Inactive medications plan nothing."""
+    planned: Counter = Counter()
+    due: Counter = Counter()
+    if not med.active:
+        return planned, due
+    day_from = max(date_from, med.start_date or date_from)
+    day_to = min(date_to, med.end_date or date_to)
+    for sc in scs:
+        tz = ZoneInfo(sc.timezone or schedules.DEFAULT_TZ)
+        start, end = _local_bounds(day_from, day_to, tz)
+        if sc.start_date is None and sc.created_at is not None:
+            created = sc.created_at
+            if created.tzinfo is None:
+                created = created.replace(tzinfo=timezone.utc)
+            start = max(start, created)
+        for at in schedules.doses(sc, start, end):
+            day = at.astimezone(tz).date()
+            planned[day] += 1
+            if at < due_by:
+                due[day] += 1
+    return planned, due
+
+
+def _summary(days: Sequence[dict]) -> dict:
+    out = {
+        k: sum(d[k] for d in days)
+        for k in ("planned", "due", *COUNTERS, "missed")
+    }
+    resolved = out["on_time"] + out["late"] + out["skipped"] + out["missed"]
+    out["adherence"] = (
+        round((out["on_time"] + out["late"]) / resolved, 4)
+        if resolved
+        else None
+    )
+    return out
+
+
+def _weekly(days: list[dict]) -> list[dict]:
+    weeks: dict[date, list[dict]] = {}
+    for d in days:
+        monday = d["date"] - timedelta(days=d["date"].weekday())
+        weeks.setdefault(monday, []).append(d)
+    return [
+        {"week_start": monday, **_summary(ds)} for monday, ds in weeks.items()
+    ]
+
+
+def medication_report(
+    med,
+    scs: Iterable,
+    counters: dict[date, object],
+    date_from: date,
+    date_to: date,
+    now: datetime,
+    bucket: str = "day",
+) -> dict:
+    """Totals and a dense per-day (or per-week) series for one medication.
+
+    ``counters`` maps day -> ``MedicationAdherenceDaily`` row. Missed doses
+    are due doses without an on-time, late or skipped log that day.
+    """
+    due_by = now - timedelta(minutes=ON_TIME_MIN)
+    planned, due = planned_doses(med, scs, date_from, date_to, due_by)
+    days = []
+    for i in range((date_to - date_from).days + 1):
+        day = date_from + timedelta(days=i)
+        row = counters.get(day)
+        item = {"date": day, "planned": planned[day], "due": due[day]}
+        item.update({k: getattr(row, k) if row else 0 for k in COUNTERS})
+        logged = item["on_time"] + item["late"] + item["skipped"]
+        item["missed"] = max(item["due"] - logged, 0)
+        days.append(item)
+    return {
+        "medication_id": med.medication_id,
+        "name": med.name,
+        "active": med.active,
+        "totals": _summary(days),
+        "series": _weekly(days) if bucket == "week" else days,
+    }
+
+
+def totals(reports: Sequence[dict]) -> dict:
+    """Totals across the medications of one report."""
+    return _summary([r["totals"] for r in reports])
@@ -0,0 +1,98 @@
+import os
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from .schemas import BulkOut, BulkRowError
+
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "5000"))
+
+# errors caused by a row's values; anything else fails the whole request
+_ROW_ERRORS = (IntegrityError, DataError)
+
+
+def validate_rows(
+    items: list[Any], schema: type[BaseModel], **fixed: Any
+) -> tuple[list[int], list[dict], list[BulkRowError]]:
+    """Validate each item on its own so one bad row does not reject the
+    batch. Returns the indices and column dicts of the valid rows (with
+    ``fixed`` columns added) and the per-row errors."""
+    if len(items) > BULK_MAX_ROWS:
+        raise HTTPException(413, f"At most {BULK_MAX_ROWS} rows per request")
+    indices, rows, errors = [], [], []
+    for i, item in enumerate(items):
+        try:
+            row = schema.model_validate(item).model_dump()
+        except ValidationError as e:
+            errors.append(
+                BulkRowError(
+                    index=i,
+                    errors=e.errors(include_url=False, include_context=False),
+                )
+            )
+            continue
+        indices.append(i)
+        rows.append({**row, **fixed})
+    return indices, rows, errors
+
+
+def _insert_each(session, model, id_attr, indices, rows):
+    # Slow path after the batch was refused: a savepoint per row, so only
+    # the rows the database rejects are dropped.
+    ids, errors = {}, []
+    for i, row in zip(indices, rows):
+        obj = model(**row)
+        try:
+            with session.begin_nested():
+                session.add(obj)
+                session.flush()
+        except _ROW_ERRORS as e:
+            errors.append(
+                BulkRowError(
+                    index=i,
+                    errors=[{"type": "database", "msg": str(e.orig)}],
+                )
+            )
+            continue
+        ids[i] = getattr(obj, id_attr)
+    return ids, errors
+
+
+async def bulk_insert(
+    db,
+    model,
+    id_attr: str,
+    total: int,
+    indices: list[int],
+    rows: list[dict],
+    errors: list[BulkRowError],
+) -> BulkOut:
+    """Insert ``rows`` in one transaction and report per-row results.
+
+    The fast path is a single executemany ``INSERT ... RETURNING`` (sent as
+    multi-row VALUES batches); if the database rejects it, the rows are
+    retried one savepoint at a time to find the offending ones.
+    """
+    ids: dict[int, Any] = {}
+    if rows:
+        stmt = insert(model).returning(
+            getattr(model, id_attr), sort_by_parameter_order=True
+        )
+        try:
+            result = await db.scalars(stmt, rows)
+            ids = dict(zip(indices, result.all()))
+        except _ROW_ERRORS:
+            await db.rollback()
+            ids, db_errors = await db.run_sync(
+                _insert_each, model, id_attr, indices, rows
+            )
+            errors = sorted(errors + db_errors, key=lambda e: e.index)
+        await db.commit()
+    return BulkOut(
+        inserted=len(ids),
+        ids=[ids.get(i) for i in range(total)],
+        errors=errors,
+    )
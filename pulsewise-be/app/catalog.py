@@ -0,0 +1,243 @@
+"""In-process cache of the published education catalog.
+
+Every ``/edu/modules`` and ``/edu/modules/{id}/sections`` response body is
+serialized to JSON, gzip-compressed and hashed into a strong ETag once per
+catalog version, then served as-is. The version is the ``max(updated_at)``
+and row count of the published modules and their sections; it is
+re-checked with one aggregate query at most every ``EDU_CACHE_CHECK_S``
+seconds and the whole catalog is reloaded when it changes.
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+
+from .models import EducationModule, EducationSection
+from .schemas import ModuleOut, SectionOut
+
+
+CACHE_ENABLED = os.getenv("EDU_CACHE", "1") == "1"
+CACHE_CHECK_S = float(os.getenv("EDU_CACHE_CHECK_S", "30"))
+MAX_AGE_S = int(os.getenv("EDU_CACHE_MAX_AGE_S", "60"))
+GZIP_MIN_BYTES = 512
+
+_PUBLISHED = EducationModule.is_published == True  # noqa: E712
+
+
+_MODULES = TypeAdapter(list[ModuleOut])
+_SECTIONS = TypeAdapter(list[SectionOut])
+
+
+class Body:
+    """One pre-encoded response: JSON bytes, gzip copy and their ETags."""
+
+    __slots__ = ("raw", "gz", "etag", "gz_etag")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        digest = hashlib.blake2b(self.raw, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        # a strong ETag names exact bytes, so the gzip copy gets its own
+        if len(self.raw) >= GZIP_MIN_BYTES:
+            self.gz: Optional[bytes] = gzip.compress(self.raw, mtime=0)
+            self.gz_etag: Optional[str] = f'"{digest}-gz"'
+        else:
+            self.gz = None
+            self.gz_etag = None
+
+    @classmethod
+    def of(cls, adapter: TypeAdapter, rows) -> "Body":
+        # the same Pydantic dump_json path FastAPI uses for response_model
+        value = adapter.validate_python(rows, from_attributes=True)
+        return cls(adapter.dump_json(value))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.raw) + (len(self.gz) if self.gz else 0)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return self.etag in tags or self.gz_etag in tags
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an ``Accept-Encoding`` header allows gzip: listed (or
+    ``x-gzip``) with q > 0, or covered by ``*`` without being refused."""
+    star = None
+    for part in (accept_encoding or "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        coding = coding.lower()
+        if coding in ("gzip", "x-gzip"):
+            return q > 0
+        if coding == "*":
+            star = q > 0
+    return bool(star)
+
+
+def modules_body(rows) -> Body:
+    return Body.of(_MODULES, rows)
+
+
+def sections_body(rows) -> Body:
+    return Body.of(_SECTIONS, rows)
+
+
+async def _version(db) -> tuple:
+    modules = (
+        await db.execute(
+            select(
+                func.max(EducationModule.updated_at), func.count()
+            ).where(_PUBLISHED)
+        )
+    ).one()
+    sections = (
+        await db.execute(
+            select(func.max(EducationSection.updated_at), func.count())
+            .join(
+                EducationModule,
+                EducationModule.module_id == EducationSection.module_id,
+            )
+            .where(_PUBLISHED)
+        )
+    ).one()
+    return (*modules, *sections)
+
+
+async def _load(db) -> tuple[Body, dict[uuid.UUID, Body]]:
+    result = await db.scalars(select(EducationModule).where(_PUBLISHED))
+    modules = result.all()
+    result = await db.scalars(
+        select(EducationSection)
+        .join(
+            EducationModule,
+            EducationModule.module_id == EducationSection.module_id,
+        )
+        .where(_PUBLISHED)
+        .order_by(EducationSection.module_id, EducationSection.order.asc())
+    )
+    sections: dict[uuid.UUID, list] = {m.module_id: [] for m in modules}
+    for s in result.all():
+        sections[s.module_id].append(s)
+    return (
+        modules_body(modules),
+        {mid: sections_body(rows) for mid, rows in sections.items()},
+    )
+
+
+class CatalogCache:
+    """Read-through cache of the published catalog (see module docstring)."""
+
+    def __init__(self, check_s: float = CACHE_CHECK_S):
+        self.check_s = check_s
+        self._modules: Optional[Body] = None
+        self._sections: dict[uuid.UUID, Body] = {}
+        self._version: Optional[tuple] = None
+        self._checked_at = float("-inf")
+        self._reload = asyncio.Lock()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.checks = 0
+        self.reloads = 0
+
+    async def _refresh(self, db) -> None:
+        reloaded = False
+        if time.monotonic() - self._checked_at >= self.check_s:
+            async with self._reload:
+                # another request may have checked while this one waited
+                if time.monotonic() - self._checked_at >= self.check_s:
+                    reloaded = await self._check(db)
+        with self._lock:
+            if reloaded:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    async def _check(self, db) -> bool:
+        version = await _version(db)
+        self.checks += 1
+        reload = version != self._version or self._modules is None
+        if reload:
+            self._modules, self._sections = await _load(db)
+            self._version = version
+            self.reloads += 1
+        self._checked_at = time.monotonic()
+        return reload
+
+    async def modules(self, db) -> Body:
+        if not CACHE_ENABLED:
+            result = await db.scalars(
+                select(EducationModule).where(_PUBLISHED)
+            )
+            return modules_body(result.all())
+        await self._refresh(db)
+        return self._modules
+
+    async def sections(self, db, module_id: uuid.UUID) -> Optional[Body]:
+        """None when the cache is off or ``module_id`` is not a published
+        module; the caller then queries the sections directly."""
+        if not CACHE_ENABLED:
+            return None
+        await self._refresh(db)
+        return self._sections.get(module_id)
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> dict:
+        bodies = [self._modules, *self._sections.values()]
+        bodies = [b for b in bodies if b is not None]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": CACHE_ENABLED,
+                "check_s": self.check_s,
+                "max_age_s": MAX_AGE_S,
+                "modules": len(self._sections),
+                "entries": len(bodies),
+                "bytes": sum(b.nbytes for b in bodies),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "checks": self.checks,
+                "reloads": self.reloads,
+                "version": [
+                    v.isoformat() if hasattr(v, "isoformat") else v
+                    for v in self._version or ()
+                ],
+            }
+
+
+_CACHE: Optional[CatalogCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_catalog() -> CatalogCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = CatalogCache()
+    return _CACHE
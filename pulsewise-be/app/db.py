@@ -1,16 +1,180 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 
 import os
+import threading
+import time
+from collections import deque
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql+psycopg://pulsewise:pulsewise@db:5432/pulsewise",
 )
+# "1": handlers await an AsyncSession on the async engine.
+# "0": the same handlers drive a sync Session in the threadpool.
+DB_ASYNC = os.getenv("DB_ASYNC", "1") == "1"
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Per-process pool; with N uvicorn workers Postgres/PgBouncer sees up to
+# N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# seconds before a connection is replaced on checkout; -1 = never
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# "1" tests every connection on checkout (one extra round-trip); "0" relies
+# on DB_POOL_RECYCLE and reconnects after the failed statement instead
+PRE_PING = os.getenv("DB_PRE_PING", "1") == "1"
+
+
+class PoolMetrics:
+    """Checkout counters and wait times for one engine's pool."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self._waits_ms: deque[float] = deque(maxlen=window)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self._waits_ms.append(wait_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            out = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_total_ms": self.wait_total_ms,
+                "wait_max_ms": self.wait_max_ms,
+            }
+        if waits:
+            out["recent_wait_ms"] = {
+                "p50": waits[len(waits) // 2],
+                "p95": waits[int(len(waits) * 0.95)],
+                "p99": waits[int(len(waits) * 0.99)],
+            }
+        return out
+
+
+class _TimedCheckout:
+    # Times how long each checkout waits for a free connection; pool events
+    # only fire once a connection has been handed out.
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            if self.metrics:
+                self.metrics.record_wait(
+                    (time.perf_counter() - t0) * 1000.0, timed_out=True
+                )
+            raise
+        if self.metrics:
+            self.metrics.record_wait((time.perf_counter() - t0) * 1000.0)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class MeteredAsyncPool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _instrument(sync_engine) -> PoolMetrics:
+    metrics = PoolMetrics()
+    sync_engine.pool.metrics = metrics
+    for name, counter in (
+        ("connect", "connects"),
+        ("checkout", "checkouts"),
+        ("checkin", "checkins"),
+        ("invalidate", "invalidations"),
+    ):
+        event.listen(
+            sync_engine,
+            name,
+            lambda *args, _c=counter: metrics.count(_c),
+        )
+    return metrics
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": PRE_PING,
+    }
+
+
+engine = create_engine(
+    DATABASE_URL, poolclass=MeteredQueuePool, **_pool_kwargs()
+)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+# psycopg 3 serves both engines from the same postgresql+psycopg:// URL
+async_engine = create_async_engine(
+    DATABASE_URL, poolclass=MeteredAsyncPool, **_pool_kwargs()
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+_METRICS = {
+    "sync": _instrument(engine),
+    "async": _instrument(async_engine.sync_engine),
+}
+
+
+def pool_status() -> dict:
+    """Live pool state and counters for both engines (only the one selected
+    by ``DB_ASYNC`` serves requests; the other stays empty)."""
+    engines = {"sync": engine, "async": async_engine.sync_engine}
+    out = {
+        "mode": "async" if DB_ASYNC else "sync",
+        "config": _pool_kwargs(),
+    }
+    for name, eng in engines.items():
+        pool = eng.pool
+        out[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            **_METRICS[name].snapshot(),
+        }
+    return out
+
 
 class Base(DeclarativeBase):
     pass
@@ -22,3 +186,67 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+class ThreadedSession:
+    """The subset of the ``AsyncSession`` API used by the routers, backed by
+    a sync ``Session`` whose calls run in the threadpool (``DB_ASYNC=0``)."""
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, obj) -> None:
+        self.sync_session.add(obj)
+
+    def add_all(self, objs) -> None:
+        self.sync_session.add_all(objs)
+
+    async def _call(self, name: str, *args, **kwargs):
+        fn = getattr(self.sync_session, name)
+        return await run_in_threadpool(fn, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await self._call("get", *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await self._call("scalar", *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await self._call("scalars", *args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return await self._call("execute", *args, **kwargs)
+
+    async def delete(self, obj) -> None:
+        await self._call("delete", obj)
+
+    async def flush(self, *args, **kwargs) -> None:
+        await self._call("flush", *args, **kwargs)
+
+    async def refresh(self, *args, **kwargs) -> None:
+        await self._call("refresh", *args, **kwargs)
+
+    async def commit(self) -> None:
+        await self._call("commit")
+
+    async def rollback(self) -> None:
+        await self._call("rollback")
+
+    async def close(self) -> None:
+        await self._call("close")
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+async def get_session():
+    """Per-request session for ``async def`` handlers; see ``DB_ASYNC``."""
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+    session = ThreadedSession(SessionLocal(expire_on_commit=False))
+    try:
+        yield session
+    finally:
+        await session.close()
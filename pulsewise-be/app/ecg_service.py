@@ -0,0 +1,39 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+
+from .ml import lifecycle
+from .routers import ecg
+
+# Standalone ECG inference service:
+#   uvicorn app.ecg_service:app --port 8001
+# Pair it with ECG_ROUTES=0 on the main API so only these workers load torch.
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lifecycle.start()
+    yield
+    lifecycle.stop()
+
+
+app = FastAPI(title="PulseWise ECG", lifespan=lifespan)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready(response: Response):
+    ok = lifecycle.is_ready()
+    if not ok:
+        response.status_code = 503
+    return {
+        "status": "ready" if ok else "not_ready",
+        "ecg": lifecycle.readiness(),
+    }
+
+
+app.include_router(ecg.router, prefix="/ecg", tags=["ecg"])
@@ -1,10 +1,34 @@
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import diaries, auth, meds, lifestyle, education
-from .routers import ecg
+from . import security
+from .pagination import NEXT_CURSOR_HEADER
+from .routers import diaries, auth, meds, lifestyle, education, internal
+
+# "1" serves /ecg from this app; "0" leaves it to app.ecg_service so CRUD-only
+# workers never import NumPy/torch.
+ECG_ROUTES = os.getenv("ECG_ROUTES", "1") == "1"
+
+if ECG_ROUTES:
+    from .ml import lifecycle as ecg_lifecycle
+    from .routers import ecg
+else:
+    ecg_lifecycle = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ecg_lifecycle:
+        ecg_lifecycle.start()
+    yield
+    security.shutdown()
+    if ecg_lifecycle:
+        ecg_lifecycle.stop()
 
-app = FastAPI(title="PulseWise API")
+
+app = FastAPI(title="PulseWise API", lifespan=lifespan)
 
 # (opsional) tidak create_all karena database sudah ada via SQL init
 # Base.metadata.create_all(bind=engine)
@@ -15,12 +39,33 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready(response: Response):
+    if not ecg_lifecycle:
+        return {"status": "ready"}
+    ok = ecg_lifecycle.is_ready()
+    if not ok:
+        response.status_code = 503
+    return {
+        "status": "ready" if ok else "not_ready",
+        "ecg": ecg_lifecycle.readiness(),
+    }
+
+
 app.include_router(diaries.router, prefix="/diaries", tags=["diaries"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(meds.router, prefix="/meds", tags=["medications"])
+app.include_router(meds.dispatch, prefix="/meds", tags=["medications"])
 app.include_router(lifestyle.router, prefix="/lifestyle", tags=["lifestyle"])
 app.include_router(education.router, prefix="/edu", tags=["education"])
-app.include_router(ecg.router, prefix="/ecg", tags=["ecg"])
+app.include_router(
+    internal.router,
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+)
+if ECG_ROUTES:
+    app.include_router(ecg.router, prefix="/ecg", tags=["ecg"])
 
 frontend_origin = os.getenv("FRONTEND_ORIGIN", "http://localhost:8080")
 app.add_middleware(
@@ -33,4 +78,5 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
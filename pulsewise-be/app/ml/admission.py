@@ -0,0 +1,212 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+# Admission control for the /ecg routes, counted in signals rather than
+# requests: a 1000-signal batch takes 1000 of ECG_MAX_INFLIGHT_SIGNALS.
+ADMISSION_ENABLED = os.getenv("ECG_ADMISSION", "1") == "1"
+MAX_INFLIGHT_SIGNALS = int(os.getenv("ECG_MAX_INFLIGHT_SIGNALS", "2048"))
+MAX_QUEUED = int(os.getenv("ECG_MAX_QUEUED", "64"))
+QUEUE_TIMEOUT_MS = float(os.getenv("ECG_QUEUE_TIMEOUT_MS", "2000"))
+RETRY_AFTER_S = int(os.getenv("ECG_RETRY_AFTER_S", "1"))
+# Largest accepted batch (413 above it) and the slice the model sees at once
+MAX_BATCH_SIGNALS = int(os.getenv("ECG_MAX_BATCH_SIGNALS", "2048"))
+CHUNK_SIGNALS = int(os.getenv("ECG_CHUNK_SIGNALS", "256"))
+# Largest request body read into memory, checked against Content-Length
+# and again while reading (413 above it)
+MAX_BODY_BYTES = int(os.getenv("ECG_MAX_BODY_BYTES", str(16 * 1024 * 1024)))
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing; ``status`` is 429 (queue full) or 503
+    (waited ``QUEUE_TIMEOUT_MS`` without getting capacity)."""
+
+    def __init__(self, status: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class SignalLimiter:
+    """Bounds the signals the /ecg routes hold at once.
+
+    Raw uploads with a Content-Length are admitted on the signal count it
+    implies, before the body is read; JSON and chunked bodies only once
+    parsed, so for those it bounds inference and ``MAX_BODY_BYTES`` bounds
+    what is read.
+
+    Requests that do not fit wait in a FIFO queue of at most ``max_queued``
+    requests, so a large batch at the head is not overtaken indefinitely by
+    small ones. A request above ``capacity`` waits until it can run alone.
+    Lives on the event loop: ``acquire``/``release`` are not thread-safe.
+    """
+
+    def __init__(
+        self,
+        capacity: int = MAX_INFLIGHT_SIGNALS,
+        max_queued: int = MAX_QUEUED,
+        timeout_ms: float = QUEUE_TIMEOUT_MS,
+        retry_after: int = RETRY_AFTER_S,
+    ):
+        self.capacity = max(1, capacity)
+        self.max_queued = max(0, max_queued)
+        self.timeout = max(0.0, timeout_ms) / 1000.0
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.requests = 0
+        self._waiters: deque[list] = deque()
+        self._lock = threading.Lock()  # counters only, for stats()
+        self.admitted = 0
+        self.queued_total = 0
+        self.max_depth = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.rejected_too_large = 0
+        self.waited = 0
+        self.wait_ms_total = 0.0
+
+    def check(self) -> None:
+        """Fail fast, before a request body is read, when the queue is
+        already full and nothing can be admitted."""
+        if self._waiters and len(self._waiters) >= self.max_queued:
+            with self._lock:
+                self.rejected_full += 1
+            raise self._overloaded(429, "ECG queue is full")
+
+    def reject_too_large(
+        self, n: int, limit: int = MAX_BATCH_SIGNALS
+    ) -> None:
+        with self._lock:
+            self.rejected_too_large += 1
+        raise Overloaded(
+            413, f"Batch of {n} signals exceeds {limit}", self.retry_after
+        )
+
+    def reject_body(self, size: int, limit: int = MAX_BODY_BYTES) -> None:
+        with self._lock:
+            self.rejected_too_large += 1
+        raise Overloaded(
+            413, f"Body of {size} bytes exceeds {limit}", self.retry_after
+        )
+
+    def _overloaded(self, status: int, detail: str) -> Overloaded:
+        return Overloaded(status, detail, self.retry_after)
+
+    async def acquire(self, n: int) -> int:
+        """Take ``n`` signals of capacity; returns the amount to release."""
+        n = min(max(n, 1), self.capacity)
+        if not self._waiters and self.in_flight + n <= self.capacity:
+            self._grant(n)
+            return n
+        if len(self._waiters) >= self.max_queued:
+            with self._lock:
+                self.rejected_full += 1
+            raise self._overloaded(429, "ECG queue is full")
+        fut = asyncio.get_running_loop().create_future()
+        entry = [n, fut]
+        self._waiters.append(entry)
+        started = time.monotonic()
+        with self._lock:
+            self.queued_total += 1
+            self.max_depth = max(self.max_depth, len(self._waiters))
+        try:
+            await asyncio.wait_for(fut, self.timeout)
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                # granted just as the wait ended; hand it back
+                self.release(n)
+            else:
+                fut.cancel()
+                try:
+                    self._waiters.remove(entry)
+                except ValueError:
+                    pass
+                # a large request leaving the head may unblock the rest
+                self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                with self._lock:
+                    self.rejected_timeout += 1
+                raise self._overloaded(
+                    503, "ECG inference is at capacity"
+                ) from None
+            raise
+        with self._lock:
+            self.waited += 1
+            self.wait_ms_total += (time.monotonic() - started) * 1000.0
+        return n
+
+    def _grant(self, n: int) -> None:
+        self.in_flight += n
+        self.requests += 1
+        with self._lock:
+            self.admitted += 1
+
+    def release(self, n: int) -> None:
+        self.in_flight -= n
+        self.requests -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            n, fut = self._waiters[0]
+            if fut.done():
+                self._waiters.popleft()
+                continue
+            if self.in_flight + n > self.capacity:
+                return
+            self._waiters.popleft()
+            self._grant(n)
+            fut.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, n: int):
+        taken = await self.acquire(n)
+        try:
+            yield
+        finally:
+            self.release(taken)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": ADMISSION_ENABLED,
+                "max_inflight_signals": self.capacity,
+                "max_queued": self.max_queued,
+                "queue_timeout_ms": self.timeout * 1000.0,
+                "max_batch_signals": MAX_BATCH_SIGNALS,
+                "chunk_signals": CHUNK_SIGNALS,
+                "max_body_bytes": MAX_BODY_BYTES,
+                "inflight_signals": self.in_flight,
+                "inflight_requests": self.requests,
+                "queue_depth": len(self._waiters),
+                "max_queue_depth": self.max_depth,
+                "admitted": self.admitted,
+                "queued": self.queued_total,
+                "mean_queue_wait_ms": (
+                    self.wait_ms_total / self.waited if self.waited else 0.0
+                ),
+                "rejected": {
+                    "queue_full": self.rejected_full,
+                    "timeout": self.rejected_timeout,
+                    "too_large": self.rejected_too_large,
+                },
+            }
+
+
+_LIMITER: Optional[SignalLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_limiter() -> SignalLimiter:
+    global _LIMITER
+    if _LIMITER is None:
+        with _LIMITER_LOCK:
+            if _LIMITER is None:
+                _LIMITER = SignalLimiter()
+    return _LIMITER
@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+import numpy as np
+
+from .config import EXPECTED_LENGTH
+from .workers import compute_probs
+
+
+BATCHING_ENABLED = os.getenv("ECG_BATCHING", "1") == "1"
+BATCH_MAX_SIZE = int(os.getenv("ECG_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("ECG_BATCH_MAX_WAIT_MS", "5"))
+
+
+class _Pending:
+    __slots__ = ("signal", "norm", "future", "enqueued_at", "alone")
+
+    def __init__(self, signal: np.ndarray, norm: str):
+        self.signal = signal
+        self.norm = norm
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        # nothing queued or being computed when it arrived
+        self.alone = False
+
+
+class BatchStats:
+    def __init__(self, window: int = 2048):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.signals = 0
+        self.max_batch = 0
+        self.sizes: dict[int, int] = {}
+        self._waits_ms: deque[float] = deque(maxlen=window)
+
+    def record(self, size: int, waits_ms: list[float]) -> None:
+        with self._lock:
+            self.batches += 1
+            self.signals += size
+            self.max_batch = max(self.max_batch, size)
+            self.sizes[size] = self.sizes.get(size, 0) + 1
+            self._waits_ms.extend(waits_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = np.fromiter(self._waits_ms, dtype=np.float64)
+            sizes = dict(sorted(self.sizes.items()))
+            batches, signals, max_batch = (
+                self.batches,
+                self.signals,
+                self.max_batch,
+            )
+        if waits.size:
+            p50, p95, p99 = np.percentile(waits, [50, 95, 99]).tolist()
+            wait = {
+                "mean": float(waits.mean()),
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+                "max": float(waits.max()),
+            }
+        else:
+            wait = {}
+        return {
+            "batches": batches,
+            "signals": signals,
+            "mean_batch_size": signals / batches if batches else 0.0,
+            "largest_batch": max_batch,
+            "batch_size_histogram": sizes,
+            "queue_wait_ms": wait,
+        }
+
+
+class MicroBatcher:
+    """Groups concurrent single-signal requests into one forward pass.
+
+    A batch is flushed as soon as it holds ``max_batch_size`` signals or the
+    oldest queued signal has waited ``max_wait_ms``. A request that arrives
+    while nothing is queued or being computed runs at once, so quiet
+    traffic pays no wait; under load, requests arriving during a forward
+    pass form the next batch.
+
+    The worker thread is started on the first ``submit`` and stopped by
+    ``close`` (``shutdown`` from the app lifespan).
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[np.ndarray, str], np.ndarray] = compute_probs,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ):
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.stats = BatchStats()
+        self._queue: deque[_Pending] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+        self._closed = False
+
+    def submit(self, signal: np.ndarray, norm: str = "zscore") -> np.ndarray:
+        """Queue one signal of shape (L,) and block until its probs arrive."""
+        if signal.ndim != 1 or signal.shape[0] != EXPECTED_LENGTH:
+            raise ValueError(f"Each signal must have length {EXPECTED_LENGTH}")
+        item = _Pending(signal, norm)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("ECG batcher is shut down")
+            if self._thread is None or not self._thread.is_alive():
+                # daemon only as a fallback for scripts that never close()
+                self._thread = threading.Thread(
+                    target=self._run, name="ecg-batcher", daemon=True
+                )
+                self._thread.start()
+            item.alone = not self._queue and not self._busy
+            self._queue.append(item)
+            self._cond.notify()
+        return item.future.result()
+
+    def predict(self, signals: np.ndarray, norm: str = "zscore") -> np.ndarray:
+        """``compute``-compatible wrapper: submits each row of ``signals``."""
+        return np.stack([self.submit(s, norm=norm) for s in signals])
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Run what is already queued, then stop and join the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _next_batch(self) -> list[_Pending]:
+        # empty once closed and drained
+        with self._cond:
+            self._busy = False
+            while not self._queue:
+                if self._closed:
+                    return []
+                self._cond.wait()
+            head = self._queue[0]
+            if not (len(self._queue) == 1 and head.alone):
+                deadline = head.enqueued_at + self.max_wait
+                while (
+                    len(self._queue) < self.max_batch_size
+                    and not self._closed
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            n = min(len(self._queue), self.max_batch_size)
+            self._busy = True
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            started = time.monotonic()
+            self.stats.record(
+                len(batch),
+                [(started - p.enqueued_at) * 1000.0 for p in batch],
+            )
+            groups: dict[str, list[_Pending]] = {}
+            for p in batch:
+                groups.setdefault(p.norm, []).append(p)
+            for norm, items in groups.items():
+                self._dispatch(norm, items)
+
+    def _dispatch(self, norm: str, items: list[_Pending]) -> None:
+        try:
+            x = np.stack([p.signal for p in items]).astype(
+                np.float32, copy=False
+            )
+            probs = self.fn(x, norm)
+        except Exception as e:  # propagate to every waiting caller
+            for p in items:
+                p.future.set_exception(e)
+            return
+        for i, p in enumerate(items):
+            p.future.set_result(probs[i])
+
+
+_BATCHER: Optional[MicroBatcher] = None
+_BATCHER_LOCK = threading.Lock()
+
+
+def get_batcher() -> MicroBatcher:
+    global _BATCHER
+    if _BATCHER is None:
+        with _BATCHER_LOCK:
+            if _BATCHER is None:
+                _BATCHER = MicroBatcher()
+    return _BATCHER
+
+
+def shutdown() -> None:
+    global _BATCHER
+    with _BATCHER_LOCK:
+        batcher, _BATCHER = _BATCHER, None
+    if batcher is not None:
+        batcher.close()
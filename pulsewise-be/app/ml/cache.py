@@ -0,0 +1,133 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from .config import N_CLASSES, weights_fingerprint
+
+
+CACHE_ENABLED = os.getenv("ECG_CACHE", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("ECG_CACHE_MAX_ENTRIES", "50000"))
+CACHE_TTL_S = float(os.getenv("ECG_CACHE_TTL_S", "600"))
+
+
+class ResultCache:
+    """Bounded LRU + TTL cache of per-signal probabilities.
+
+    Keys are a BLAKE2 digest of the float32 signal bytes plus the
+    normalization mode. The whole cache is dropped when the weights
+    fingerprint changes, so results from old weights are never served.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl_s: float = CACHE_TTL_S,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._data: OrderedDict[bytes, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _keys(signals: np.ndarray, norm: str) -> list[bytes]:
+        tag = norm.encode()
+        return [
+            tag + hashlib.blake2b(row.data, digest_size=16).digest()
+            for row in signals
+        ]
+
+    def _check_fingerprint(self) -> None:
+        fp = weights_fingerprint()
+        if fp != self._fingerprint:
+            if self._fingerprint is not None:
+                self.invalidations += 1
+            self._data.clear()
+            self._fingerprint = fp
+
+    def predict(
+        self,
+        signals: np.ndarray,
+        norm: str,
+        compute: Callable[[np.ndarray, str], np.ndarray],
+    ) -> np.ndarray:
+        """Return probs for ``signals``, running ``compute`` on misses only."""
+        signals = np.ascontiguousarray(signals, dtype=np.float32)
+        if signals.ndim != 2:
+            raise ValueError("signals must be 2D: (batch, length)")
+        keys = self._keys(signals, norm)
+        out = np.empty((signals.shape[0], N_CLASSES), dtype=np.float32)
+        missing: list[int] = []
+        now = time.monotonic()
+        with self._lock:
+            self._check_fingerprint()
+            for i, k in enumerate(keys):
+                hit = self._data.get(k)
+                if hit is not None and hit[0] > now:
+                    self._data.move_to_end(k)
+                    out[i] = hit[1]
+                    continue
+                if hit is not None:
+                    del self._data[k]
+                    self.expirations += 1
+                missing.append(i)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return out
+
+        probs = compute(signals[missing], norm)
+        out[missing] = probs
+        expires = time.monotonic() + self.ttl_s
+        with self._lock:
+            for j, i in enumerate(missing):
+                self._data[keys[i]] = (expires, probs[j].copy())
+                self._data.move_to_end(keys[i])
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": CACHE_ENABLED,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "weights_fingerprint": self._fingerprint,
+            }
+
+
+_CACHE: Optional[ResultCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_cache() -> ResultCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResultCache()
+    return _CACHE
@@ -0,0 +1,45 @@
+import hashlib
+import os
+import time
+
+# Kept free of torch/NumPy imports so the API can read ECG settings without
+# loading the ML stack; app.ml.ecgnet is only imported on first inference.
+EXPECTED_LENGTH = int(os.getenv("ECG_SIGNAL_LENGTH", "187"))
+N_CLASSES = 2
+WEIGHTS_PATH = os.getenv("ECG_WEIGHTS_PATH", "")
+FREEZE_MODEL = os.getenv("ECG_FREEZE", "1") == "1"
+WEIGHTS_CHECK_S = float(os.getenv("ECG_WEIGHTS_CHECK_S", "10"))
+# Moving-average window (samples) subtracted before normalization; 0 = off
+BASELINE_WINDOW = int(os.getenv("ECG_BASELINE_WINDOW", "0"))
+
+# Opt-in INT8 inference (see app.ml.quantize)
+QUANTIZE = os.getenv("ECG_QUANTIZE", "0") == "1"
+QUANT_CALIBRATION_PATH = os.getenv("ECG_QUANT_CALIBRATION_PATH", "")
+QUANT_EVAL_PATH = os.getenv("ECG_QUANT_EVAL_PATH", "")
+QUANT_MIN_AGREEMENT = float(os.getenv("ECG_QUANT_MIN_AGREEMENT", "0.99"))
+QUANT_BACKEND = os.getenv("ECG_QUANT_BACKEND", "fbgemm")
+
+_fingerprint: tuple[float, str] = (float("-inf"), "")
+
+
+def weights_fingerprint() -> str:
+    """Identify the weights file currently at ``ECG_WEIGHTS_PATH``.
+
+    Derived from the path, size and mtime, re-checked at most every
+    ``ECG_WEIGHTS_CHECK_S`` seconds; changes when the file is replaced.
+    """
+    global _fingerprint
+    now = time.monotonic()
+    checked_at, fp = _fingerprint
+    if now - checked_at < WEIGHTS_CHECK_S:
+        return fp
+    try:
+        st = os.stat(WEIGHTS_PATH) if WEIGHTS_PATH else None
+    except OSError:
+        st = None
+    ident = (
+        f"{WEIGHTS_PATH}:{st.st_size}:{st.st_mtime_ns}" if st else "untrained"
+    )
+    fp = hashlib.blake2b(ident.encode(), digest_size=8).hexdigest()
+    _fingerprint = (now, fp)
+    return fp
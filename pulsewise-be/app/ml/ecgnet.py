@@ -1,23 +1,45 @@
+import copy
+import logging
 import os
+import threading
 from typing import Optional
 
 import numpy as np
 import torch
 from torch import nn
 
+from .config import (
+    BASELINE_WINDOW,
+    EXPECTED_LENGTH,
+    FREEZE_MODEL,
+    N_CLASSES,
+    QUANTIZE,
+    WEIGHTS_PATH,
+    weights_fingerprint,
+)
+
 
 class Conv2dWithConstraint(nn.Conv2d):
     def __init__(self, *args, max_norm: float = 1.0, **kwargs):
         self.max_norm = max_norm
         super().__init__(*args, **kwargs)
 
-    def forward(self, x):  # type: ignore[override]
+    def apply_max_norm(self) -> None:
         self.weight.data = torch.renorm(
             self.weight.data, p=2, dim=0, maxnorm=self.max_norm
         )
+
+    def forward(self, x):  # type: ignore[override]
+        # The constraint only changes weights while training; at inference
+        # it is applied once by freeze_for_inference / get_model.
+        if self.training:
+            self.apply_max_norm()
         return super().forward(x)
 
 
+_OUT_SIZE_CACHE: dict[tuple, torch.Size] = {}
+
+
 class ECGNet(nn.Module):
     def InitialBlocks(self, dropoutRate: float):
         block1 = nn.Sequential(
@@ -82,7 +104,8 @@ class ECGNet(nn.Module):
     def CalculateOutSize(self, model: nn.Module, channels: int, samples: int):
         data = torch.rand(1, 1, channels, samples)
         model.eval()
-        out = model(data).shape
+        with torch.no_grad():
+            out = model(data).shape
         return out[2:]
 
     def __init__(
@@ -109,9 +132,14 @@ class ECGNet(nn.Module):
         self.dropoutRate = dropoutRate
 
         self.blocks = self.InitialBlocks(dropoutRate)
-        self.blockOutputSize = self.CalculateOutSize(
-            self.blocks, channels, samples
-        )
+        # The output size only depends on the hyperparameters, so the dummy
+        # forward pass runs once per configuration, not once per build.
+        key = (channels, samples, kernelLength, kernelLength2, F1, D, F2)
+        if key not in _OUT_SIZE_CACHE:
+            _OUT_SIZE_CACHE[key] = self.CalculateOutSize(
+                self.blocks, channels, samples
+            )
+        self.blockOutputSize = _OUT_SIZE_CACHE[key]
         self.classifierBlock = self.ClassifierBlock(
             self.F2 * self.blockOutputSize[1], n_classes
         )
@@ -123,15 +151,93 @@ class ECGNet(nn.Module):
         return x
 
 
-EXPECTED_LENGTH = int(os.getenv("ECG_SIGNAL_LENGTH", "187"))
-WEIGHTS_PATH = os.getenv("ECG_WEIGHTS_PATH", "")
+def _fuse_conv_bn(conv: nn.Conv2d, bn: nn.BatchNorm2d) -> nn.Conv2d:
+    # y = gamma * (conv(x) - mean) / sqrt(var + eps) + beta, folded into
+    # the conv weights and a per-channel bias.
+    fused = nn.Conv2d(
+        conv.in_channels,
+        conv.out_channels,
+        conv.kernel_size,
+        stride=conv.stride,
+        padding=conv.padding,
+        dilation=conv.dilation,
+        groups=conv.groups,
+        bias=True,
+    )
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    bias = conv.bias if conv.bias is not None else torch.zeros_like(scale)
+    with torch.no_grad():
+        fused.weight.copy_(conv.weight * scale.reshape(-1, 1, 1, 1))
+        fused.bias.copy_((bias - bn.running_mean) * scale + bn.bias)
+    return fused.eval()
+
+
+def fold_blocks(seq: nn.Sequential) -> nn.Sequential:
+    """Return an inference copy of ``seq`` with each BatchNorm folded into the
+    conv before it and identity dropouts removed."""
+    mods = list(seq.children())
+    out: list[nn.Module] = []
+    i = 0
+    while i < len(mods):
+        m = mods[i]
+        nxt = mods[i + 1] if i + 1 < len(mods) else None
+        if isinstance(m, nn.Sequential):
+            out.append(fold_blocks(m))
+        elif isinstance(m, nn.Conv2d) and isinstance(nxt, nn.BatchNorm2d):
+            out.append(_fuse_conv_bn(m, nxt))
+            i += 1
+        elif isinstance(m, nn.Dropout):
+            pass
+        else:
+            out.append(copy.deepcopy(m))
+        i += 1
+    return nn.Sequential(*out).eval()
+
+
+def freeze_for_inference(
+    model: ECGNet, atol: float = 1e-5, check_batch: int = 8
+) -> nn.Module:
+    """Build a frozen TorchScript graph of ``model`` for CPU inference.
+
+    Max-norm is applied once, BatchNorm is folded into the preceding convs,
+    dropouts are dropped and the result is traced and ``torch.jit.freeze``d.
+    Raises ``ValueError`` if the frozen graph's outputs differ from the eager
+    model by more than ``atol``.
+    """
+    model = model.eval()
+    for m in model.modules():
+        if isinstance(m, Conv2dWithConstraint):
+            m.apply_max_norm()
+
+    fused = copy.deepcopy(model)
+    fused.blocks = fold_blocks(model.blocks)
+    fused.eval()
+
+    example = torch.rand(1, 1, model.channels, model.samples)
+    with torch.no_grad():
+        traced = torch.jit.trace(fused, example)
+        frozen = torch.jit.freeze(traced)
+
+        check = torch.randn(check_batch, 1, model.channels, model.samples)
+        for x in (check[:1], check):
+            diff = (frozen(x) - model(x)).abs().max().item()
+            if diff > atol:
+                raise ValueError(
+                    f"Frozen ECGNet deviates from eager model by {diff:.2e}"
+                )
+    return frozen
+
+
+logger = logging.getLogger(__name__)
 
-_MODEL: Optional[ECGNet] = None
+_MODEL: Optional[nn.Module] = None
+_MODEL_FINGERPRINT: Optional[str] = None
+_MODEL_LOCK = threading.Lock()
 
 
 def _build_model() -> ECGNet:
     model = ECGNet(
-        n_classes=2,
+        n_classes=N_CLASSES,
         channels=1,
         samples=EXPECTED_LENGTH,
         dropoutRate=0.0,
@@ -144,32 +250,76 @@ def _build_model() -> ECGNet:
     return model
 
 
-def get_model() -> ECGNet:
-    global _MODEL
-    if _MODEL is None:
-        model = _build_model()
-        if WEIGHTS_PATH and os.path.isfile(WEIGHTS_PATH):
-            state = torch.load(WEIGHTS_PATH, map_location="cpu")
-            # Accept either full state_dict or model.state_dict() keys
-            if isinstance(state, dict) and all(
-                k.startswith("blocks") or k.startswith("classifierBlock")
-                for k in state.keys()
-            ):
-                model.load_state_dict(state)  # type: ignore[arg-type]
-            elif (
-                isinstance(state, dict)
-                and "state_dict" in state
-                and isinstance(state["state_dict"], dict)
-            ):
-                model.load_state_dict(
-                    state["state_dict"]
-                )  # type: ignore[arg-type]
-            else:
-                # try strict=False to be tolerant
-                model.load_state_dict(
-                    state, strict=False
-                )  # type: ignore[arg-type]
-        _MODEL = model.eval()
+def _load_state(path: str):
+    # mmap=True maps the checkpoint instead of reading it into private
+    # memory, so worker processes loading the same file share its pages.
+    try:
+        return torch.load(
+            path, map_location="cpu", mmap=True, weights_only=True
+        )
+    except Exception:
+        # legacy (non-zipfile) checkpoints or pickled extras
+        return torch.load(path, map_location="cpu")
+
+
+def _load_weights(model: ECGNet, path: str) -> None:
+    state = _load_state(path)
+    # Accept either full state_dict or model.state_dict() keys
+    if isinstance(state, dict) and all(
+        k.startswith("blocks") or k.startswith("classifierBlock")
+        for k in state.keys()
+    ):
+        model.load_state_dict(state, assign=True)  # type: ignore[arg-type]
+    elif (
+        isinstance(state, dict)
+        and "state_dict" in state
+        and isinstance(state["state_dict"], dict)
+    ):
+        model.load_state_dict(
+            state["state_dict"], assign=True
+        )  # type: ignore[arg-type]
+    else:
+        # try strict=False to be tolerant
+        model.load_state_dict(
+            state, strict=False
+        )  # type: ignore[arg-type]
+
+
+def get_model() -> nn.Module:
+    """Return the inference model, rebuilding it when the weights file at
+    ``ECG_WEIGHTS_PATH`` has been replaced."""
+    global _MODEL, _MODEL_FINGERPRINT
+    fp = weights_fingerprint()
+    if _MODEL is not None and fp == _MODEL_FINGERPRINT:
+        return _MODEL
+    with _MODEL_LOCK:
+        if _MODEL is None or fp != _MODEL_FINGERPRINT:
+            model = _build_model()
+            if WEIGHTS_PATH and os.path.isfile(WEIGHTS_PATH):
+                _load_weights(model, WEIGHTS_PATH)
+            model.eval()
+            for m in model.modules():
+                if isinstance(m, Conv2dWithConstraint):
+                    m.apply_max_norm()
+            served: Optional[nn.Module] = None
+            if QUANTIZE:
+                from .quantize import build_quantized
+
+                try:
+                    served = build_quantized(model)
+                except Exception:
+                    logger.exception(
+                        "INT8 ECGNet refused, serving the float model"
+                    )
+            if served is None and FREEZE_MODEL:
+                try:
+                    served = freeze_for_inference(model)
+                except Exception:
+                    logger.exception(
+                        "ECGNet freeze failed, using eager model"
+                    )
+            _MODEL = served if served is not None else model
+            _MODEL_FINGERPRINT = fp
     return _MODEL
 
 
@@ -189,21 +339,126 @@ def normalize_signal(x: np.ndarray, method: str = "zscore") -> np.ndarray:
     return x
 
 
-def predict_probs(signals: np.ndarray, norm: str = "zscore") -> np.ndarray:
+def normalize_batch(
+    signals: np.ndarray,
+    method: str = "zscore",
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Row-wise ``normalize_signal`` for a whole (N, L) matrix.
+
+    Works in place on ``out`` (float32, same shape; allocated if omitted),
+    which may be ``signals`` itself. Flat rows get std 1 (zscore) or all
+    zeros (minmax), as in ``normalize_signal``.
+    """
+    if out is None:
+        out = np.empty(signals.shape, dtype=np.float32)
+    if out is not signals:
+        np.copyto(out, signals, casting="same_kind")
+    if method == "zscore":
+        out -= out.mean(axis=1, keepdims=True)
+        std = np.sqrt(
+            np.einsum("ij,ij->i", out, out) / out.shape[1]
+        )[:, None]
+        std[std < 1e-8] = 1.0
+        out /= std
+    elif method == "minmax":
+        mn = out.min(axis=1, keepdims=True)
+        rng = out.max(axis=1, keepdims=True)
+        rng -= mn
+        flat = rng[:, 0] < 1e-8
+        rng[flat] = 1.0
+        out -= mn
+        out /= rng
+        out[flat] = 0.0
+    return out
+
+
+def remove_baseline(
+    signals: np.ndarray, window: int, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Subtract a centred ``window``-sample moving average (edge-padded) from
+    every row, removing baseline wander slower than the window."""
+    if out is None:
+        out = np.empty(signals.shape, dtype=np.float32)
+    if out is not signals:
+        np.copyto(out, signals, casting="same_kind")
+    if window <= 1:
+        return out
+    n, length = out.shape
+    left, right = (window - 1) // 2, window // 2
+    csum = np.zeros((n, length + window), dtype=np.float64)
+    np.cumsum(out, axis=1, out=csum[:, left + 1 : left + 1 + length])
+    # the edge padding contributes a constant per sample on each side
+    csum[:, : left + 1] = csum[:, left + 1 : left + 2] - out[:, :1] * (
+        np.arange(left, -1, -1)[None, :] + 1
+    )
+    csum[:, left + 1 + length :] = csum[
+        :, left + length : left + 1 + length
+    ] + out[:, -1:] * np.arange(1, right + 1)[None, :]
+    trend = csum[:, window:] - csum[:, :-window]
+    trend /= window
+    out -= trend.astype(np.float32, copy=False)
+    return out
+
+
+def resample_batch(
+    signals: np.ndarray, length: int = EXPECTED_LENGTH
+) -> np.ndarray:
+    """Linearly resample every row of ``signals`` to ``length`` samples.
+    Returns ``signals`` unchanged if it already has that length."""
+    if signals.shape[1] == length:
+        return signals
+    src = signals.shape[1]
+    if src < 2:
+        raise ValueError("signals need at least 2 samples to resample")
+    pos = np.linspace(0.0, src - 1, length)
+    lo = np.minimum(pos.astype(np.intp), src - 2)
+    frac = (pos - lo).astype(np.float32)
+    out = signals[:, lo + 1].astype(np.float32)
+    lower = signals[:, lo]
+    out -= lower
+    out *= frac
+    out += lower
+    return out
+
+
+def preprocess(
+    signals: np.ndarray,
+    norm: str = "zscore",
+    baseline_window: int = BASELINE_WINDOW,
+    resample: bool = False,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Resample (optional), remove baseline wander (``baseline_window`` >
+    1) and normalize, reusing one float32 buffer for every stage."""
+    if resample:
+        signals = resample_batch(signals)
+    if baseline_window > 1:
+        out = remove_baseline(signals, baseline_window, out=out)
+        signals = out
+    return normalize_batch(signals, norm, out=out)
+
+
+def to_input(signals: np.ndarray, norm: str = "zscore") -> torch.Tensor:
     if signals.ndim != 2:
         raise ValueError("signals must be 2D: (batch, length)")
     if signals.shape[1] != EXPECTED_LENGTH:
         raise ValueError(f"Each signal must have length {EXPECTED_LENGTH}")
 
-    # Normalize per sample
-    signals = np.stack([normalize_signal(s, norm) for s in signals], axis=0)
+    x = preprocess(signals, norm)
+    # (N, L) -> (N, 1, 1, L) without copying
+    return torch.from_numpy(x)[:, None, None, :]
+
 
-    model = get_model()
+def predict_probs(
+    signals: np.ndarray,
+    norm: str = "zscore",
+    model: Optional[nn.Module] = None,
+) -> np.ndarray:
+    t = to_input(signals, norm)
+    if model is None:
+        model = get_model()
     with torch.no_grad():
-        t = torch.from_numpy(signals.astype(np.float32))  # (N, L)
-        # (N, 1, L) then (N, 1, 1, L)
-        t = t.unsqueeze(1)
-        t = t.unsqueeze(1)  # (N, 1, 1, L)
         out = model(t)
         probs = out.cpu().numpy()
         return probs
@@ -0,0 +1,43 @@
+import logging
+import os
+import threading
+
+from . import batcher, workers
+
+logger = logging.getLogger(__name__)
+
+# Load ECG weights and warm the model up at startup instead of on the first
+# /ecg request. Readiness is reported on /ready, not /health.
+ECG_PRELOAD = os.getenv("ECG_PRELOAD", "1") == "1"
+_state = {"status": "loading" if ECG_PRELOAD else "lazy"}
+
+
+def _preload() -> None:
+    try:
+        workers.warmup()
+        _state["status"] = "ready"
+    except Exception as e:
+        logger.exception("ECG model warm-up failed")
+        _state["status"] = "failed"
+        _state["error"] = str(e)
+
+
+def start() -> None:
+    if ECG_PRELOAD:
+        threading.Thread(
+            target=_preload, name="ecg-preload", daemon=True
+        ).start()
+
+
+def stop() -> None:
+    # the batcher runs through the pool, so it goes first
+    batcher.shutdown()
+    workers.shutdown_pool()
+
+
+def readiness() -> dict:
+    return dict(_state)
+
+
+def is_ready() -> bool:
+    return _state["status"] in ("ready", "lazy")
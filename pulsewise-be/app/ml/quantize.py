@@ -0,0 +1,210 @@
+"""INT8 post-training static quantization for ECGNet.
+
+Compare a quantized build against the float model:
+
+    python -m app.ml.quantize --weights ecgnet.pth \
+        --calibration calib.npy --eval holdout.npy --min-agreement 0.99
+
+Exits non-zero if ``predicted_class`` agreement is below the threshold.
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+import torch
+from torch import nn
+from torch.ao.quantization import (
+    DeQuantStub,
+    QuantStub,
+    convert,
+    get_default_qconfig,
+    prepare,
+)
+
+from .config import (
+    QUANT_BACKEND,
+    QUANT_CALIBRATION_PATH,
+    QUANT_EVAL_PATH,
+    QUANT_MIN_AGREEMENT,
+)
+from .ecgnet import (
+    Conv2dWithConstraint,
+    ECGNet,
+    fold_blocks,
+    predict_probs,
+    to_input,
+)
+
+
+class QuantizedECGNet(nn.Module):
+    """ECGNet with BatchNorm folded and quant/dequant stubs around the INT8
+    conv/linear body; softmax stays in float."""
+
+    def __init__(self, model: ECGNet):
+        super().__init__()
+        self.quant = QuantStub()
+        self.blocks = fold_blocks(model.blocks)
+        self.linear = copy.deepcopy(model.classifierBlock[0])
+        self.dequant = DeQuantStub()
+        self.softmax = nn.Softmax(dim=1)
+
+    def forward(self, x):  # type: ignore[override]
+        x = self.quant(x)
+        x = self.blocks(x)
+        x = x.reshape(x.size(0), -1)
+        x = self.linear(x)
+        x = self.dequant(x)
+        return self.softmax(x)
+
+
+def quantize_model(
+    model: ECGNet,
+    calibration: np.ndarray,
+    norm: str = "zscore",
+    backend: str = QUANT_BACKEND,
+    batch_size: int = 256,
+) -> nn.Module:
+    """Statically quantize ``model`` using ``calibration`` signals (N, L) to
+    collect activation ranges."""
+    if calibration.ndim != 2 or calibration.shape[0] == 0:
+        raise ValueError("calibration must be a non-empty (N, L) array")
+    model = model.eval()
+    for m in model.modules():
+        if isinstance(m, Conv2dWithConstraint):
+            m.apply_max_norm()
+
+    torch.backends.quantized.engine = backend
+    qmodel = QuantizedECGNet(model).eval()
+    qmodel.qconfig = get_default_qconfig(backend)
+    prepare(qmodel, inplace=True)
+    with torch.no_grad():
+        for i in range(0, calibration.shape[0], batch_size):
+            qmodel(to_input(calibration[i : i + batch_size], norm))
+    convert(qmodel, inplace=True)
+    return qmodel.eval()
+
+
+def _latency(
+    model: nn.Module, signals: np.ndarray, norm: str, repeat: int
+) -> dict:
+    predict_probs(signals, norm, model=model)  # warm-up
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        predict_probs(signals, norm, model=model)
+        times.append(time.perf_counter() - t0)
+    arr = np.asarray(times) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "signals_per_s": signals.shape[0] / (arr.mean() / 1000.0),
+    }
+
+
+def compare(
+    float_model: nn.Module,
+    quant_model: nn.Module,
+    signals: np.ndarray,
+    norm: str = "zscore",
+    batch_sizes: tuple[int, ...] = (1, 32, 256),
+    repeat: int = 20,
+) -> dict:
+    """Report class agreement and latency/throughput of both models."""
+    ref = predict_probs(signals, norm, model=float_model)
+    got = predict_probs(signals, norm, model=quant_model)
+    report: dict = {
+        "signals": int(signals.shape[0]),
+        "agreement": float(
+            np.mean(ref.argmax(axis=1) == got.argmax(axis=1))
+        ),
+        "max_abs_prob_diff": float(np.abs(ref - got).max()),
+        "latency": {},
+    }
+    for n in batch_sizes:
+        batch = np.resize(signals, (n, signals.shape[1])).astype(np.float32)
+        report["latency"][n] = {
+            "float": _latency(float_model, batch, norm, repeat),
+            "int8": _latency(quant_model, batch, norm, repeat),
+        }
+    return report
+
+
+def build_quantized(model: ECGNet) -> nn.Module:
+    """Quantize for serving from the ``ECG_QUANT_*`` settings.
+
+    Raises ``ValueError`` when no calibration set is configured or the
+    quantized model agrees with the float model on fewer than
+    ``ECG_QUANT_MIN_AGREEMENT`` of the evaluation signals.
+    """
+    if not QUANT_CALIBRATION_PATH:
+        raise ValueError("ECG_QUANTIZE=1 needs ECG_QUANT_CALIBRATION_PATH")
+    calibration = np.load(QUANT_CALIBRATION_PATH).astype(np.float32)
+    holdout = (
+        np.load(QUANT_EVAL_PATH).astype(np.float32)
+        if QUANT_EVAL_PATH
+        else calibration
+    )
+    qmodel = quantize_model(model, calibration)
+    ref = predict_probs(holdout, model=model)
+    got = predict_probs(holdout, model=qmodel)
+    agreement = float(np.mean(ref.argmax(axis=1) == got.argmax(axis=1)))
+    if agreement < QUANT_MIN_AGREEMENT:
+        raise ValueError(
+            f"INT8 agreement {agreement:.4f} is below "
+            f"ECG_QUANT_MIN_AGREEMENT={QUANT_MIN_AGREEMENT}"
+        )
+    return qmodel
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    from .ecgnet import _build_model, _load_weights
+
+    ap = argparse.ArgumentParser(
+        description="Compare INT8-quantized ECGNet with the float model"
+    )
+    ap.add_argument(
+        "--weights", help="state_dict (.pth); untrained if omitted"
+    )
+    ap.add_argument("--calibration", required=True, help=".npy (N, L)")
+    ap.add_argument("--eval", help=".npy (N, L); defaults to calibration")
+    ap.add_argument("--norm", default="zscore")
+    ap.add_argument("--backend", default=QUANT_BACKEND)
+    ap.add_argument(
+        "--min-agreement", type=float, default=QUANT_MIN_AGREEMENT
+    )
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--json", help="write the report to this file")
+    args = ap.parse_args(argv)
+
+    model = _build_model()
+    if args.weights:
+        _load_weights(model, args.weights)
+    model.eval()
+    calibration = np.load(args.calibration).astype(np.float32)
+    holdout = (
+        np.load(args.eval).astype(np.float32) if args.eval else calibration
+    )
+    qmodel = quantize_model(model, calibration, args.norm, args.backend)
+    report = compare(model, qmodel, holdout, args.norm, repeat=args.repeat)
+    report["min_agreement"] = args.min_agreement
+    report["accepted"] = report["agreement"] >= args.min_agreement
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if not report["accepted"]:
+        print(
+            f"REFUSED: agreement {report['agreement']:.4f} < "
+            f"{args.min_agreement}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
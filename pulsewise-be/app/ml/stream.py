@@ -0,0 +1,95 @@
+from typing import Iterator, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from . import wire
+
+
+class WindowStream:
+    """Cuts an unbounded sample stream into fixed-length windows.
+
+    Windows start every ``stride`` samples and are returned as zero-copy
+    strided views in groups of at most ``batch_size``. Only the samples the
+    next window still needs are carried between ``feed`` calls, so memory
+    stays at roughly one chunk plus one window regardless of how long the
+    recording is.
+    """
+
+    def __init__(self, length: int, stride: int, batch_size: int = 256):
+        if length < 1 or stride < 1 or batch_size < 1:
+            raise ValueError("length, stride and batch_size must be >= 1")
+        self.length = length
+        self.stride = stride
+        self.batch_size = batch_size
+        self.samples = 0
+        self.windows = 0
+        self._tail = np.empty(0, dtype=np.float32)
+        self._tail_start = 0  # absolute index of _tail[0]
+        self._next = 0  # absolute index of the next window start
+
+    def feed(
+        self, samples: np.ndarray
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Yield ``(starts, windows)`` for every window completed by
+        ``samples``; ``windows`` has shape ``(n, length)``."""
+        self.samples += samples.size
+        if self._tail.size:
+            buf = np.concatenate([self._tail, samples.astype(np.float32)])
+        else:
+            buf = samples.astype(np.float32, copy=False)
+        first = self._next - self._tail_start
+        count = 0
+        if buf.size - first >= self.length:
+            count = (buf.size - first - self.length) // self.stride + 1
+            views = sliding_window_view(buf, self.length)
+            views = views[first : first + count * self.stride : self.stride]
+            for i in range(0, count, self.batch_size):
+                batch = views[i : i + self.batch_size]
+                starts = self._next + self.stride * np.arange(
+                    i, i + batch.shape[0]
+                )
+                yield starts, batch
+        self.windows += count
+        self._next += count * self.stride
+        keep = min(self._next - self._tail_start, buf.size)
+        # copy so the carried tail does not pin the whole chunk in memory
+        self._tail = buf[keep:].copy()
+        self._tail_start += keep
+
+
+class SampleDecoder:
+    """Turns arbitrarily split byte chunks of a raw float32/int16 upload into
+    float32 sample arrays, carrying partial samples across chunks."""
+
+    def __init__(self, content_type: str, scale: Optional[str] = None):
+        mt = wire.media_type(content_type)
+        if mt == wire.FLOAT32:
+            self.dtype = np.dtype("<f4")
+            self.scale = None
+        elif mt == wire.INT16:
+            self.dtype = np.dtype("<i2")
+            try:
+                self.scale = np.float32(scale) if scale else np.float32(1.0)
+            except ValueError:
+                raise ValueError(f"Invalid X-ECG-Scale header: {scale!r}")
+        else:
+            raise wire.UnsupportedMediaType(
+                f"Streaming needs {wire.FLOAT32} or {wire.INT16}, got {mt!r}"
+            )
+        self._pending = b""
+
+    def decode(self, chunk: bytes) -> np.ndarray:
+        data = self._pending + chunk if self._pending else chunk
+        usable = len(data) - len(data) % self.dtype.itemsize
+        self._pending = data[usable:]
+        raw = np.frombuffer(
+            data, dtype=self.dtype, count=usable // self.dtype.itemsize
+        )
+        if self.scale is not None:
+            return np.multiply(raw, self.scale, dtype=np.float32)
+        return raw.astype(np.float32, copy=False)
+
+    @property
+    def leftover(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,117 @@
+import io
+from typing import Optional
+
+import numpy as np
+
+
+JSON = "application/json"
+NPY = "application/x-npy"
+FLOAT32 = "application/octet-stream"
+INT16 = "application/x-ecg-int16"
+
+BINARY_TYPES = (NPY, FLOAT32, INT16)
+RESPONSE_TYPES = (NPY, FLOAT32)
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def media_type(header: Optional[str]) -> str:
+    if not header:
+        return JSON
+    return header.split(";", 1)[0].strip().lower()
+
+
+def _parse_shape(header: Optional[str], n_items: int, length: int) -> tuple:
+    if not header:
+        if n_items % length:
+            raise ValueError(
+                f"Body holds {n_items} samples, not a multiple of {length}"
+            )
+        return (n_items // length, length)
+    try:
+        shape = tuple(int(d) for d in header.replace("x", ",").split(","))
+    except ValueError:
+        raise ValueError(f"Invalid X-ECG-Shape header: {header!r}")
+    if any(d < 0 for d in shape) or int(np.prod(shape)) != n_items:
+        raise ValueError(
+            f"X-ECG-Shape {shape} does not match {n_items} samples in body"
+        )
+    return shape
+
+
+def _read_npy(body: bytes) -> np.ndarray:
+    fp = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(fp)
+    except ValueError as e:
+        raise ValueError(f"Invalid .npy body: {e}")
+    if dtype.hasobject or dtype.kind not in "fiu":
+        raise ValueError(f"Unsupported .npy dtype {dtype}")
+    count = int(np.prod(shape))
+    if len(body) - fp.tell() < count * dtype.itemsize:
+        raise ValueError("Truncated .npy body")
+    arr = np.frombuffer(body, dtype=dtype, count=count, offset=fp.tell())
+    return arr.reshape(shape, order="F" if fortran else "C")
+
+
+def decode_signals(
+    body: bytes,
+    content_type: str,
+    length: int,
+    shape: Optional[str] = None,
+    scale: Optional[str] = None,
+) -> np.ndarray:
+    """Decode a binary request body into a float32 array without per-sample
+    Python objects. Raw bodies are reshaped with ``shape`` (the
+    ``X-ECG-Shape`` header, e.g. ``"32,187"``) or inferred from ``length``.
+    """
+    mt = media_type(content_type)
+    if mt == NPY:
+        arr = _read_npy(body)
+    elif mt == FLOAT32:
+        if len(body) % 4:
+            raise ValueError("float32 body length must be a multiple of 4")
+        arr = np.frombuffer(body, dtype="<f4")
+        arr = arr.reshape(_parse_shape(shape, arr.size, length))
+    elif mt == INT16:
+        if len(body) % 2:
+            raise ValueError("int16 body length must be a multiple of 2")
+        try:
+            factor = np.float32(scale) if scale else np.float32(1.0)
+        except ValueError:
+            raise ValueError(f"Invalid X-ECG-Scale header: {scale!r}")
+        raw = np.frombuffer(body, dtype="<i2")
+        raw = raw.reshape(_parse_shape(shape, raw.size, length))
+        arr = np.multiply(raw, factor, dtype=np.float32)
+    else:
+        raise UnsupportedMediaType(f"Unsupported content type {mt!r}")
+    return arr.astype(np.float32, copy=False)
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Return the binary response type preferred by ``accept``, else None."""
+    if not accept:
+        return None
+    for part in accept.split(","):
+        mt = media_type(part)
+        if mt in RESPONSE_TYPES:
+            return mt
+        if mt in (JSON, "*/*", "application/*"):
+            return None
+    return None
+
+
+def encode_array(arr: np.ndarray, mt: str) -> tuple[bytes, dict[str, str]]:
+    arr = np.ascontiguousarray(arr, dtype="<f4")
+    headers = {"X-ECG-Shape": ",".join(str(d) for d in arr.shape)}
+    if mt == NPY:
+        fp = io.BytesIO()
+        np.save(fp, arr, allow_pickle=False)
+        return fp.getvalue(), headers
+    return arr.tobytes(), headers
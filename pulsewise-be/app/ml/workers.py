@@ -0,0 +1,218 @@
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Optional
+
+import numpy as np
+
+from .cache import CACHE_ENABLED, get_cache
+from .config import EXPECTED_LENGTH, N_CLASSES
+
+
+# "inline" runs inference in the API process, "process" in a worker pool
+EXECUTOR = os.getenv("ECG_EXECUTOR", "inline")
+WORKERS = int(os.getenv("ECG_WORKERS", "2"))
+WORKER_THREADS = int(os.getenv("ECG_WORKER_THREADS", "1"))
+PIN_WORKERS = os.getenv("ECG_PIN_WORKERS", "1") == "1"
+WARMUP_BATCH_SIZES = tuple(
+    int(b) for b in os.getenv("ECG_WARMUP_BATCH_SIZES", "1,8,32").split(",")
+)
+
+
+def _attach(name: str) -> SharedMemory:
+    # The parent owns (and unlinks) every segment. Spawned workers share the
+    # parent's resource tracker, so attaching without track=False (< 3.13)
+    # only re-registers a name the tracker already holds.
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+# app.ml.ecgnet (and with it torch) is imported inside the functions below so
+# that importing this module stays cheap for the API process.
+
+
+def _init_worker(threads: int, cpus) -> None:
+    import torch
+
+    from .ecgnet import get_model
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus.get())
+    get_model()
+
+
+def _load_model() -> None:
+    from .ecgnet import get_model
+
+    get_model()
+
+
+def _predict_shm(
+    in_name: str, shape: tuple, out_name: str, norm: str
+) -> None:
+    from .ecgnet import predict_probs
+
+    inp = _attach(in_name)
+    out = _attach(out_name)
+    try:
+        x = np.ndarray(shape, dtype=np.float32, buffer=inp.buf)
+        res = np.ndarray(
+            (shape[0], N_CLASSES), dtype=np.float32, buffer=out.buf
+        )
+        res[:] = predict_probs(x, norm=norm)
+        del x, res
+    finally:
+        inp.close()
+        out.close()
+
+
+class InferencePool:
+    """ECG inference in dedicated processes, each with its own model and a
+    fixed torch thread count, optionally pinned to its own CPUs.
+
+    Signals and probabilities travel through ``multiprocessing.shared_memory``;
+    only segment names and shapes are pickled.
+    """
+
+    def __init__(
+        self,
+        workers: int = WORKERS,
+        threads: int = WORKER_THREADS,
+        pin: bool = PIN_WORKERS,
+    ):
+        ctx = mp.get_context("spawn")
+        cpus = None
+        if pin and hasattr(os, "sched_getaffinity"):
+            available = sorted(os.sched_getaffinity(0))
+            if len(available) >= workers * threads:
+                cpus = ctx.Queue()
+                for i in range(workers):
+                    cpus.put(set(available[i * threads : (i + 1) * threads]))
+        self.workers = workers
+        self.threads = threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(threads, cpus),
+        )
+
+    def predict(self, signals: np.ndarray, norm: str = "zscore") -> np.ndarray:
+        signals = np.ascontiguousarray(signals, dtype=np.float32)
+        if signals.ndim != 2:
+            raise ValueError("signals must be 2D: (batch, length)")
+        n = signals.shape[0]
+        inp = SharedMemory(create=True, size=max(signals.nbytes, 1))
+        out = SharedMemory(create=True, size=max(n * N_CLASSES * 4, 1))
+        try:
+            x = np.ndarray(signals.shape, dtype=np.float32, buffer=inp.buf)
+            x[:] = signals
+            del x
+            self._executor.submit(
+                _predict_shm, inp.name, signals.shape, out.name, norm
+            ).result()
+            res = np.ndarray((n, N_CLASSES), dtype=np.float32, buffer=out.buf)
+            probs = res.copy()
+            del res
+            return probs
+        finally:
+            for shm in (inp, out):
+                shm.close()
+                shm.unlink()
+
+    def warmup(self) -> None:
+        # Forces every worker to start and load its model.
+        futures = [
+            self._executor.submit(_load_model) for _ in range(self.workers)
+        ]
+        for f in futures:
+            f.result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_POOL: Optional[InferencePool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> InferencePool:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = InferencePool()
+    return _POOL
+
+
+def shutdown_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown()
+            _POOL = None
+
+
+def compute_probs(signals: np.ndarray, norm: str = "zscore") -> np.ndarray:
+    """Run the model on ``signals`` honouring ``ECG_EXECUTOR`` (no cache)."""
+    if EXECUTOR == "process":
+        return get_pool().predict(signals, norm=norm)
+    from .ecgnet import predict_probs
+
+    return predict_probs(signals, norm=norm)
+
+
+def run_inference(
+    signals: np.ndarray,
+    norm: str = "zscore",
+    compute: Callable[[np.ndarray, str], np.ndarray] = compute_probs,
+) -> np.ndarray:
+    """Entry point for ECG inference: serves repeated signals from the
+    result cache and hands the rest to ``compute``."""
+    if CACHE_ENABLED:
+        return get_cache().predict(signals, norm, compute)
+    return compute(signals, norm)
+
+
+def run_chunked(
+    signals: np.ndarray,
+    norm: str = "zscore",
+    chunk: int = 256,
+    compute: Callable[[np.ndarray, str], np.ndarray] = compute_probs,
+) -> np.ndarray:
+    """``run_inference`` over ``chunk`` signals at a time, so the model's
+    activations stay the size of one chunk however large the batch is.
+    Normalization is per signal, so the result is the same."""
+    n = signals.shape[0]
+    if n <= chunk:
+        return run_inference(signals, norm, compute)
+    out = np.empty((n, N_CLASSES), dtype=np.float32)
+    for i in range(0, n, chunk):
+        part = signals[i : i + chunk]
+        out[i : i + chunk] = run_inference(part, norm, compute)
+    return out
+
+
+def warmup(batch_sizes: tuple[int, ...] = WARMUP_BATCH_SIZES) -> None:
+    """Load the model and run a few forward passes at common batch sizes so
+    the first real request does not pay for weight loading or graph
+    optimisation."""
+    if EXECUTOR == "process":
+        get_pool().warmup()
+    else:
+        _load_model()
+    rng = np.random.default_rng(0)
+    for n in batch_sizes:
+        x = rng.standard_normal((n, EXPECTED_LENGTH), dtype=np.float32)
+        # the frozen TorchScript graph is specialised on its second call
+        for _ in range(2):
+            compute_probs(x)
@@ -1,7 +1,8 @@
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, ENUM
 import uuid
 from datetime import datetime, date, time
 from sqlalchemy import (Integer, 
+    BigInteger,
     Date,
     ForeignKey,
     Integer,
@@ -13,6 +14,45 @@ from sqlalchemy import (Integer,
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .db import Base
 
+# Enum types created by pulsewise-db/init. Mapped as ENUM (not str) so that
+# INSERT binds are cast to the enum type rather than VARCHAR, which Postgres
+# refuses to assign to an enum column.
+CONSUMPTION_TYPE = ENUM(
+    "Food", "Drink", name="consumption_type", create_type=False
+)
+FEELING_SCALE = ENUM(
+    "very_bad",
+    "bad",
+    "neutral",
+    "good",
+    "very_good",
+    name="feeling_scale",
+    create_type=False,
+)
+MED_ROUTE = ENUM(
+    "oral",
+    "sublingual",
+    "inhalation",
+    "topical",
+    "intravenous",
+    "other",
+    name="med_route",
+    create_type=False,
+)
+SYMPTOM_TYPE = ENUM(
+    "shortness_of_breath",
+    "chest_pain",
+    "palpitations",
+    "fatigue",
+    "dizziness",
+    "swelling",
+    "weight_gain",
+    "orthopnea",
+    "other",
+    name="symptom_type",
+    create_type=False,
+)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -47,7 +87,30 @@ class HeartDiary(Base):
     )
 
     vitals: Mapped[list["VitalSign"]] = relationship(
-        "VitalSign", back_populates="diary", cascade="all,delete"
+        "VitalSign",
+        back_populates="diary",
+        cascade="all,delete",
+        order_by="VitalSign.measured_at.desc()",
+    )
+    # Read through selectinload (GET /diaries/{id}/full); the database
+    # cascades deletes, so unloaded children are not fetched just to go.
+    activities: Mapped[list["DailyActivity"]] = relationship(
+        "DailyActivity",
+        cascade="all,delete",
+        passive_deletes=True,
+        order_by="DailyActivity.occurred_at.desc()",
+    )
+    consumptions: Mapped[list["DailyConsumption"]] = relationship(
+        "DailyConsumption",
+        cascade="all,delete",
+        passive_deletes=True,
+        order_by="DailyConsumption.occurred_at.desc()",
+    )
+    symptoms: Mapped[list["DiarySymptom"]] = relationship(
+        "DiarySymptom",
+        cascade="all,delete",
+        passive_deletes=True,
+        order_by="DiarySymptom.occurred_at.desc()",
     )
 
 
@@ -91,7 +154,7 @@ class Medication(Base):
     condition_tag: Mapped[str | None]
     dosage_amount: Mapped[float | None] = mapped_column(Numeric(10, 3))
     dosage_unit: Mapped[str | None]
-    route: Mapped[str | None]
+    route: Mapped[str | None] = mapped_column(MED_ROUTE)
     active: Mapped[bool]
     start_date: Mapped[date | None] = mapped_column(Date)
     end_date: Mapped[date | None] = mapped_column(Date)
@@ -119,6 +182,10 @@ class MedicationSchedule(Base):
     remind_offset_min: Mapped[int | None]
     start_date: Mapped[date | None] = mapped_column(Date)
     end_date: Mapped[date | None] = mapped_column(Date)
+    # next reminder time (see app.schedules); NULL once no doses remain
+    next_fire_at: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True)
+    )
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), default=datetime.utcnow
     )
@@ -160,7 +227,7 @@ class DailyConsumption(Base):
     diary_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("heart_diaries.diary_id", ondelete="CASCADE")
     )
-    type: Mapped[str]
+    type: Mapped[str] = mapped_column(CONSUMPTION_TYPE)
     name: Mapped[str]
     portion: Mapped[str | None]
     sodium_mg: Mapped[int | None]
@@ -186,7 +253,7 @@ class DailyActivity(Base):
     name: Mapped[str]
     duration_min: Mapped[int]
     heart_rate: Mapped[int | None]
-    user_feeling: Mapped[str | None]
+    user_feeling: Mapped[str | None] = mapped_column(FEELING_SCALE)
     note: Mapped[str | None]
     occurred_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
     created_at: Mapped[datetime] = mapped_column(
@@ -205,7 +272,7 @@ class DiarySymptom(Base):
     diary_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("heart_diaries.diary_id", ondelete="CASCADE")
     )
-    type: Mapped[str]
+    type: Mapped[str] = mapped_column(SYMPTOM_TYPE)
     severity: Mapped[int]
     note: Mapped[str | None]
     occurred_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
@@ -267,3 +334,46 @@ class EducationProgress(Base):
     completed_at: Mapped[datetime | None] = mapped_column(
         TIMESTAMP(timezone=True)
     )
+
+
+class VitalDailyRollup(Base):
+    """Per-diary vital sums/counts, written only by the ``vital_signs``
+    triggers (migration 0003); read by ``GET /diaries/trends``."""
+
+    __tablename__ = "vital_daily_rollups"
+    diary_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("heart_diaries.diary_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    user_id: Mapped[uuid.UUID]
+    diary_date: Mapped[date] = mapped_column(Date)
+    readings: Mapped[int]
+    weight_sum: Mapped[float] = mapped_column(Numeric)
+    weight_n: Mapped[int]
+    systolic_sum: Mapped[int] = mapped_column(BigInteger)
+    systolic_n: Mapped[int]
+    diastolic_sum: Mapped[int] = mapped_column(BigInteger)
+    diastolic_n: Mapped[int]
+    hr_sum: Mapped[int] = mapped_column(BigInteger)
+    hr_n: Mapped[int]
+    hr_min: Mapped[int | None]
+    spo2_sum: Mapped[int] = mapped_column(BigInteger)
+    spo2_n: Mapped[int]
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class MedicationAdherenceDaily(Base):
+    """Per-medication, per-day log counters, written only by the
+    ``medication_logs`` triggers (migration 0005)."""
+
+    __tablename__ = "medication_adherence_daily"
+    medication_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("medications.medication_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    on_time: Mapped[int]
+    late: Mapped[int]
+    skipped: Mapped[int]
+    unscheduled: Mapped[int]
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
@@ -0,0 +1,63 @@
+import base64
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: date | datetime, row_id: uuid.UUID) -> str:
+    raw = json.dumps([sort_value.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_type: type) -> tuple[Any, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_type.fromisoformat(value), uuid.UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def keyset(
+    stmt: Select,
+    sort_col,
+    id_col,
+    cursor: Optional[str],
+    limit: int,
+    sort_type: type = datetime,
+) -> Select:
+    """Newest-first page of ``stmt`` ordered by ``(sort_col, id_col)``.
+
+    The cursor is the last row of the previous page; the row comparison
+    seeks straight to it through the matching index, so every page costs
+    the same however deep it is. Fetches one extra row to detect the end.
+    """
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_type)
+        stmt = stmt.where(tuple_(sort_col, id_col) < tuple_(value, row_id))
+    return stmt.order_by(sort_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def page(
+    rows: Sequence,
+    limit: int,
+    response: Response,
+    sort_attr: str,
+    id_attr: str,
+) -> list:
+    """Trim the extra row from ``keyset`` and set ``X-Next-Cursor`` if
+    there is another page."""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, sort_attr), getattr(last, id_attr)
+        )
+    return rows
@@ -1,108 +1,271 @@
 import uuid
-from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
-from ..db import get_db
-from ..models import HeartDiary, VitalSign
-from ..schemas import DiaryCreate, DiaryUpdate, DiaryOut, VitalCreate, VitalOut
+from datetime import date, timedelta
+from typing import Any, Literal, Optional
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
+from ..bulk import bulk_insert, validate_rows
+from ..db import get_session
+from ..models import HeartDiary, VitalDailyRollup, VitalSign
+from ..pagination import keyset, page
+from ..schemas import (
+    BulkOut,
+    DiaryCreate,
+    DiaryFullOut,
+    DiaryOut,
+    DiaryUpdate,
+    VitalCreate,
+    VitalOut,
+    columns,
+)
+from ..security import Principal, current_user, ensure_self, get_owned
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(current_user)])
+
+_NOT_FOUND = "Diary not found"
+
+# One SELECT per child table for the whole page of diaries, instead of one
+# HTTP call and diary re-check per list.
+_FULL = (
+    selectinload(HeartDiary.vitals),
+    selectinload(HeartDiary.activities),
+    selectinload(HeartDiary.consumptions),
+    selectinload(HeartDiary.symptoms),
+)
+
+
+# The list queries, also EXPLAINed by bench/explain_indexes.py
+def diaries_query(
+    user_id,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+    full: bool = False,
+):
+    """A page of ``GET /diaries``, or of ``GET /diaries/full`` (whole
+    diaries with their children) when ``full``."""
+    if full:
+        stmt = select(HeartDiary).options(*_FULL)
+    else:
+        stmt = select(*columns(HeartDiary, DiaryOut))
+    stmt = stmt.where(HeartDiary.user_id == user_id)
+    if date_from:
+        stmt = stmt.where(HeartDiary.diary_date >= date_from)
+    if date_to:
+        stmt = stmt.where(HeartDiary.diary_date <= date_to)
+    return keyset(
+        stmt,
+        HeartDiary.diary_date,
+        HeartDiary.diary_id,
+        cursor,
+        limit,
+        sort_type=date,
+    )
+
+
+def trends_query(user_id, start: date, end: date):
+    return (
+        select(VitalDailyRollup)
+        .where(VitalDailyRollup.user_id == user_id)
+        .where(VitalDailyRollup.diary_date.between(start, end))
+        .order_by(VitalDailyRollup.diary_date)
+    )
+
+
+def vitals_query(diary_id, cursor: str | None = None, limit: int = 100):
+    return keyset(
+        select(*columns(VitalSign, VitalOut)).where(
+            VitalSign.diary_id == diary_id
+        ),
+        VitalSign.measured_at,
+        VitalSign.vital_id,
+        cursor,
+        limit,
+    )
 
 
 # ---- Diaries
 @router.post("", response_model=DiaryOut)
-def create_diary(body: DiaryCreate, db: Session = Depends(get_db)):
-    # enforce unique (user_id, diary_date)
-    exists = db.scalar(
-        select(HeartDiary).where(
-            and_(
-                HeartDiary.user_id == body.user_id,
-                HeartDiary.diary_date == body.diary_date,
-            )
-        )
+async def create_diary(
+    body: DiaryCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    ensure_self(user, body.user_id)
+    # uq_diary (user_id, diary_date) decides; no SELECT first, no race
+    d = await db.scalar(
+        insert(HeartDiary)
+        .values(**body.model_dump())
+        .on_conflict_do_nothing(constraint="uq_diary")
+        .returning(HeartDiary)
     )
-    if exists:
+    if d is None:
         raise HTTPException(409, "Diary for this user & date already exists")
-    d = HeartDiary(**body.model_dump())
-    db.add(d)
-    db.commit()
-    db.refresh(d)
+    await db.commit()
     return d
 
 
 @router.get("", response_model=list[DiaryOut])
-def list_diaries(
+async def list_diaries(
     user_id: uuid.UUID,
+    response: Response,
     date_from: date | None = None,
     date_to: date | None = None,
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_session),
 ):
-    stmt = select(HeartDiary).where(HeartDiary.user_id == user_id)
-    if date_from:
-        stmt = stmt.where(HeartDiary.diary_date >= date_from)
-    if date_to:
-        stmt = stmt.where(HeartDiary.diary_date <= date_to)
-    stmt = stmt.order_by(HeartDiary.diary_date.desc()).limit(limit)
-    rows = db.scalars(stmt).all()
-    return rows
+    result = await db.execute(
+        diaries_query(user_id, date_from, date_to, cursor, limit)
+    )
+    return page(result.all(), limit, response, "diary_date", "diary_id")
+
+
+@router.get("/trends", response_model=dict)
+async def vital_trends(
+    user_id: uuid.UUID,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    bucket: Literal["day", "week"] = "day",
+    windows: str = Query("3,7", pattern=r"^\d+(,\d+)*$"),
+    db: AsyncSession = Depends(get_session),
+):
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to or (date_to - date_from).days > 366:
+        raise HTTPException(400, "date range must be 1 to 367 days")
+    wins = sorted({int(w) for w in windows.split(",")})
+    if wins[0] < 1 or wins[-1] > 31:
+        raise HTTPException(400, "windows must be between 1 and 31 days")
+
+    from .. import trends  # NumPy is only loaded on first use
+
+    start = date_from - timedelta(days=trends.lookback_days(wins))
+    result = await db.scalars(trends_query(user_id, start, date_to))
+    return {
+        "user_id": user_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "bucket": bucket,
+        "windows": wins if bucket == "day" else [],
+        "series": trends.compute_trends(
+            result.all(), date_from, date_to, wins, bucket
+        ),
+    }
+
+
+@router.get("/full", response_model=list[DiaryFullOut])
+async def list_diaries_full(
+    user_id: uuid.UUID,
+    response: Response,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = Query(7, ge=1, le=31),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_session),
+):
+    result = await db.scalars(
+        diaries_query(user_id, date_from, date_to, cursor, limit, full=True)
+    )
+    return page(result.all(), limit, response, "diary_date", "diary_id")
+
+
+@router.get("/{diary_id}/full", response_model=DiaryFullOut)
+async def get_diary_full(
+    diary_id: uuid.UUID,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    return await get_owned(
+        db, HeartDiary, diary_id, user, _NOT_FOUND, options=_FULL
+    )
 
 
 @router.get("/{diary_id}", response_model=DiaryOut)
-def get_diary(diary_id: uuid.UUID, db: Session = Depends(get_db)):
-    d = db.get(HeartDiary, diary_id)
-    if not d:
-        raise HTTPException(404, "Diary not found")
-    return d
+async def get_diary(
+    diary_id: uuid.UUID,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    return await get_owned(db, HeartDiary, diary_id, user, _NOT_FOUND)
 
 
 @router.put("/{diary_id}", response_model=DiaryOut)
-def update_diary(
-    diary_id: uuid.UUID, body: DiaryUpdate, db: Session = Depends(get_db)
+async def update_diary(
+    diary_id: uuid.UUID,
+    body: DiaryUpdate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    d = db.get(HeartDiary, diary_id)
-    if not d:
-        raise HTTPException(404, "Diary not found")
+    d = await get_owned(db, HeartDiary, diary_id, user, _NOT_FOUND)
     if body.notes is not None:
         d.notes = body.notes
-    db.commit()
-    db.refresh(d)
+    await db.commit()
     return d
 
 
 @router.delete("/{diary_id}")
-def delete_diary(diary_id: uuid.UUID, db: Session = Depends(get_db)):
-    d = db.get(HeartDiary, diary_id)
-    if not d:
-        raise HTTPException(404, "Diary not found")
-    db.delete(d)
-    db.commit()
+async def delete_diary(
+    diary_id: uuid.UUID,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    d = await get_owned(db, HeartDiary, diary_id, user, _NOT_FOUND)
+    await db.delete(d)
+    await db.commit()
     return {"ok": True}
 
 
 # ---- Vitals (nested)
 @router.post("/{diary_id}/vitals", response_model=VitalOut)
-def add_vital(
-    diary_id: uuid.UUID, body: VitalCreate, db: Session = Depends(get_db)
+async def add_vital(
+    diary_id: uuid.UUID,
+    body: VitalCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    if not db.get(HeartDiary, diary_id):
-        raise HTTPException(404, "Diary not found")
+    await get_owned(db, HeartDiary, diary_id, user, _NOT_FOUND)
     v = VitalSign(diary_id=diary_id, **body.model_dump())
     db.add(v)
-    db.commit()
-    db.refresh(v)
+    await db.commit()
     return v
 
 
-@router.get("/{diary_id}/vitals", response_model=list[VitalOut])
-def list_vitals(diary_id: uuid.UUID, db: Session = Depends(get_db)):
-    if not db.get(HeartDiary, diary_id):
-        raise HTTPException(404, "Diary not found")
-    rows = (
-        db.query(VitalSign)
-        .filter(VitalSign.diary_id == diary_id)
-        .order_by(VitalSign.measured_at.desc())
-        .all()
+@router.post("/{diary_id}/vitals/bulk", response_model=BulkOut)
+async def add_vitals_bulk(
+    diary_id: uuid.UUID,
+    body: list[Any] = Body(...),
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    await get_owned(db, HeartDiary, diary_id, user, _NOT_FOUND)
+    indices, rows, errors = validate_rows(
+        body, VitalCreate, diary_id=diary_id
+    )
+    return await bulk_insert(
+        db, VitalSign, "vital_id", len(body), indices, rows, errors
     )
-    return rows
+
+
+@router.get("/{diary_id}/vitals", response_model=list[VitalOut])
+async def list_vitals(
+    diary_id: uuid.UUID,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    await get_owned(db, HeartDiary, diary_id, user, _NOT_FOUND)
+    result = await db.execute(vitals_query(diary_id, cursor, limit))
+    return page(result.all(), limit, response, "measured_at", "vital_id")
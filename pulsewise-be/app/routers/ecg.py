@@ -1,14 +1,41 @@
-from typing import List, Literal
+import json
+from contextlib import asynccontextmanager, nullcontext
+from typing import List, Literal, Optional
 
 import numpy as np
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
 
-from ..ml.ecgnet import EXPECTED_LENGTH, predict_probs
+from ..ml import wire
+from ..ml.admission import (
+    ADMISSION_ENABLED,
+    CHUNK_SIGNALS,
+    MAX_BATCH_SIGNALS,
+    MAX_BODY_BYTES,
+    Overloaded,
+    get_limiter,
+)
+from ..ml.batcher import BATCHING_ENABLED, get_batcher
+from ..ml.cache import get_cache
+from ..ml.config import EXPECTED_LENGTH
+from ..ml.stream import SampleDecoder, WindowStream
+from ..ml.workers import (
+    EXECUTOR,
+    WORKER_THREADS,
+    WORKERS,
+    run_chunked,
+    run_inference,
+)
+from ..security import require_service
 
 
 router = APIRouter()
 
+Norm = Literal["zscore", "minmax", "none"]
+
 
 class ECGPredictIn(BaseModel):
     signal: List[float] = Field(
@@ -17,7 +44,7 @@ class ECGPredictIn(BaseModel):
         min_length=EXPECTED_LENGTH,
         max_length=EXPECTED_LENGTH,
     )
-    norm: Literal["zscore", "minmax", "none"] = "zscore"
+    norm: Norm = "zscore"
 
 
 class ECGPredictOut(BaseModel):
@@ -25,26 +52,9 @@ class ECGPredictOut(BaseModel):
     predicted_class: int
 
 
-@router.post("/predict", response_model=ECGPredictOut)
-def predict(body: ECGPredictIn):
-    try:
-        x = np.array(body.signal, dtype=np.float32)[None, :]
-        if body.norm == "zscore":
-            norm = "zscore"
-        elif body.norm == "minmax":
-            norm = "minmax"
-        else:
-            norm = "none"
-        probs = predict_probs(x, norm=norm)
-        pred = int(np.argmax(probs[0]))
-        return ECGPredictOut(probs=probs[0].tolist(), predicted_class=pred)
-    except ValueError as e:
-        raise HTTPException(400, str(e))
-
-
 class ECGPredictBatchIn(BaseModel):
     signals: List[List[float]] = Field(..., description="Batch of ECG signals")
-    norm: Literal["zscore", "minmax", "none"] = "zscore"
+    norm: Norm = "zscore"
 
 
 class ECGPredictBatchOut(BaseModel):
@@ -52,19 +62,333 @@ class ECGPredictBatchOut(BaseModel):
     predicted_classes: List[int]
 
 
-@router.post("/predict-batch", response_model=ECGPredictBatchOut)
-def predict_batch(body: ECGPredictBatchIn):
-    arr = np.array(body.signals, dtype=np.float32)
-    if arr.ndim != 2 or arr.shape[1] != EXPECTED_LENGTH:
+def _body_doc(model: type[BaseModel]) -> dict:
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                wire.JSON: {"schema": model.model_json_schema()},
+                wire.NPY: binary,
+                wire.FLOAT32: binary,
+                wire.INT16: binary,
+            },
+        }
+    }
+
+
+async def _read_capped(request: Request) -> bytes:
+    # Content-Length was checked in _precheck; this catches chunked bodies
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            try:
+                get_limiter().reject_body(size)
+            except Overloaded as e:
+                raise _overloaded(e)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _read_body(request: Request, model: type[BaseModel]):
+    """Return the parsed JSON model, or a float32 array for binary bodies.
+
+    Binary bodies (``.npy``, raw little-endian float32, or int16 ADC samples
+    scaled by ``X-ECG-Scale``) are decoded with ``np.frombuffer`` so no
+    per-sample Python floats are created.
+    """
+    raw = await _read_capped(request)
+    content_type = request.headers.get("content-type")
+    if wire.media_type(content_type) == wire.JSON:
+        try:
+            return model.model_validate_json(raw)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+    try:
+        return wire.decode_signals(
+            raw,
+            content_type,
+            EXPECTED_LENGTH,
+            shape=request.headers.get("x-ecg-shape"),
+            scale=request.headers.get("x-ecg-scale"),
+        )
+    except wire.UnsupportedMediaType as e:
+        raise HTTPException(415, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    headers = None
+    if e.status in (429, 503):
+        headers = {"Retry-After": str(e.retry_after)}
+    return HTTPException(e.status, e.detail, headers=headers)
+
+
+# raw sample bytes per signal, to size uploads before reading them
+_ITEMSIZE = {wire.FLOAT32: 4, wire.INT16: 2}
+
+
+def _declared_signals(request: Request) -> int:
+    """Signals a raw upload holds according to its Content-Length, 0 when
+    that is unknown (JSON or chunked). ``.npy`` is assumed float32, the
+    format this service answers with."""
+    mt = wire.media_type(request.headers.get("content-type"))
+    itemsize = 4 if mt == wire.NPY else _ITEMSIZE.get(mt)
+    length = request.headers.get("content-length", "")
+    if not itemsize or not length.isdigit():
+        return 0
+    return int(length) // (itemsize * EXPECTED_LENGTH)
+
+
+def _precheck(request: Request, sized: bool = True) -> None:
+    """Shed load before the body is read: 429 while the admission queue is
+    full and, with ``sized``, 413 when the Content-Length is over
+    ``ECG_MAX_BODY_BYTES`` or a raw float32/int16 upload is larger than
+    ``ECG_MAX_BATCH_SIGNALS``."""
+    limiter = get_limiter()
+    try:
+        if ADMISSION_ENABLED:
+            limiter.check()
+        if not sized:
+            return
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > MAX_BODY_BYTES:
+            limiter.reject_body(int(length))
+        mt = wire.media_type(request.headers.get("content-type"))
+        n = _declared_signals(request)
+        if mt in _ITEMSIZE and n > MAX_BATCH_SIGNALS:
+            limiter.reject_too_large(n)
+    except Overloaded as e:
+        raise _overloaded(e)
+
+
+@asynccontextmanager
+async def _admitted(n: int):
+    if not ADMISSION_ENABLED:
+        yield
+        return
+    limiter = get_limiter()
+    try:
+        taken = await limiter.acquire(n)
+    except Overloaded as e:
+        raise _overloaded(e)
+    try:
+        yield
+    finally:
+        limiter.release(taken)
+
+
+async def single_signal(
+    request: Request, norm: Norm
+) -> tuple[np.ndarray, str]:
+    body = await _read_body(request, ECGPredictIn)
+    if isinstance(body, ECGPredictIn):
+        return np.array(body.signal, dtype=np.float32), body.norm
+    if body.size != EXPECTED_LENGTH:
         raise HTTPException(
             400, f"Each signal must have length {EXPECTED_LENGTH}"
         )
-    if body.norm == "zscore":
-        norm = "zscore"
-    elif body.norm == "minmax":
-        norm = "minmax"
+    return body.reshape(EXPECTED_LENGTH), norm
+
+
+async def signal_batch(
+    request: Request, norm: Norm
+) -> tuple[np.ndarray, str]:
+    body = await _read_body(request, ECGPredictBatchIn)
+    if isinstance(body, ECGPredictBatchIn):
+        try:
+            arr = np.array(body.signals, dtype=np.float32)
+        except ValueError:
+            arr = np.empty(0, dtype=np.float32)
+        norm = body.norm
     else:
-        norm = "none"
-    probs = predict_probs(arr, norm=norm)
+        arr = body
+    if arr.ndim != 2 or arr.shape[1] != EXPECTED_LENGTH:
+        raise HTTPException(
+            400, f"Each signal must have length {EXPECTED_LENGTH}"
+        )
+    if arr.shape[0] > MAX_BATCH_SIGNALS:
+        try:
+            get_limiter().reject_too_large(arr.shape[0])
+        except Overloaded as e:
+            raise _overloaded(e)
+    return arr, norm
+
+
+async def admitted_signal(request: Request, norm: Norm = "zscore"):
+    _precheck(request)
+    async with _admitted(1):
+        yield await single_signal(request, norm)
+
+
+async def admitted_batch(request: Request, norm: Norm = "zscore"):
+    """Holds ``len(signals)`` of the in-flight signal budget until the
+    response is done; 429/503 with ``Retry-After`` when it cannot.
+
+    Raw uploads are admitted on their Content-Length before the body is
+    read, so waiting requests hold no payload; JSON and chunked ones (and
+    a ``.npy`` of a narrower dtype) take the rest once parsed.
+    """
+    _precheck(request)
+    declared = min(_declared_signals(request), MAX_BATCH_SIGNALS)
+    async with _admitted(declared) if declared else nullcontext():
+        arr, norm = await signal_batch(request, norm)
+        rest = arr.shape[0] - declared
+        async with _admitted(rest) if rest > 0 else nullcontext():
+            yield arr, norm
+
+
+def _binary_response(
+    request: Request, probs: np.ndarray
+) -> Optional[Response]:
+    mt = wire.negotiate(request.headers.get("accept"))
+    if mt is None:
+        return None
+    content, headers = wire.encode_array(probs, mt)
+    return Response(content=content, media_type=mt, headers=headers)
+
+
+@router.post(
+    "/predict",
+    response_model=ECGPredictOut,
+    openapi_extra=_body_doc(ECGPredictIn),
+)
+def predict(
+    request: Request,
+    payload: tuple[np.ndarray, str] = Depends(admitted_signal),
+):
+    x, norm = payload
+    try:
+        if BATCHING_ENABLED:
+            compute = get_batcher().predict
+            row = run_inference(x[None, :], norm=norm, compute=compute)[0]
+        else:
+            row = run_inference(x[None, :], norm=norm)[0]
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    binary = _binary_response(request, row)
+    if binary is not None:
+        return binary
+    pred = int(np.argmax(row))
+    return ECGPredictOut(probs=row.tolist(), predicted_class=pred)
+
+
+@router.post(
+    "/predict-batch",
+    response_model=ECGPredictBatchOut,
+    openapi_extra=_body_doc(ECGPredictBatchIn),
+)
+def predict_batch(
+    request: Request,
+    payload: tuple[np.ndarray, str] = Depends(admitted_batch),
+):
+    arr, norm = payload
+    probs = run_chunked(arr, norm=norm, chunk=CHUNK_SIGNALS)
+    binary = _binary_response(request, probs)
+    if binary is not None:
+        return binary
     preds = np.argmax(probs, axis=1).astype(int).tolist()
     return ECGPredictBatchOut(probs=probs.tolist(), predicted_classes=preds)
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    # StreamingResponse normally drains ``receive`` to watch for disconnects,
+    # which would swallow the request body we are still reading. Disconnects
+    # surface through ``request.stream()`` instead.
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@router.post("/analyze-stream")
+async def analyze_stream(
+    request: Request,
+    stride: int = Query(EXPECTED_LENGTH // 2, ge=1),
+    norm: Norm = "zscore",
+    batch_size: int = Query(256, ge=1, le=4096),
+):
+    """Sliding-window analysis of a long recording uploaded as raw float32 or
+    int16 samples (chunked transfer is fine). Emits one NDJSON line per
+    window as soon as it is complete, then a final summary line."""
+    try:
+        decoder = SampleDecoder(
+            request.headers.get("content-type", ""),
+            scale=request.headers.get("x-ecg-scale"),
+        )
+    except wire.UnsupportedMediaType as e:
+        raise HTTPException(415, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    # a recording is not a batch: any length is fine, window batches are
+    # admitted one at a time below
+    _precheck(request, sized=False)
+    windows = WindowStream(EXPECTED_LENGTH, stride, batch_size)
+
+    async def results():
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            for starts, batch in windows.feed(decoder.decode(chunk)):
+                try:
+                    async with _admitted(batch.shape[0]):
+                        probs = await run_in_threadpool(
+                            run_inference, batch, norm
+                        )
+                except HTTPException as e:
+                    # the status line is already sent; end the stream
+                    yield json.dumps(
+                        {
+                            "error": e.detail,
+                            "status": e.status_code,
+                            "retry_after": (e.headers or {}).get(
+                                "Retry-After"
+                            ),
+                            "samples": windows.samples,
+                        }
+                    ) + "\n"
+                    return
+                preds = np.argmax(probs, axis=1)
+                lines = [
+                    json.dumps(
+                        {
+                            "start": int(s),
+                            "end": int(s) + EXPECTED_LENGTH,
+                            "probs": p.tolist(),
+                            "predicted_class": int(c),
+                        }
+                    )
+                    for s, p, c in zip(starts, probs, preds)
+                ]
+                yield "\n".join(lines) + "\n"
+        yield json.dumps(
+            {
+                "done": True,
+                "samples": windows.samples,
+                "windows": windows.windows,
+                "trailing_bytes": decoder.leftover,
+            }
+        ) + "\n"
+
+    return _DuplexStreamingResponse(
+        results(), media_type="application/x-ndjson"
+    )
+
+
+@router.get("/stats", dependencies=[Depends(require_service)])
+def stats():
+    return {
+        "executor": {
+            "mode": EXECUTOR,
+            "workers": WORKERS if EXECUTOR == "process" else 0,
+            "threads_per_worker": WORKER_THREADS,
+        },
+        "batching": {
+            "enabled": BATCHING_ENABLED,
+            "max_batch_size": get_batcher().max_batch_size,
+            "max_wait_ms": get_batcher().max_wait * 1000.0,
+            **get_batcher().stats.snapshot(),
+        },
+        "cache": get_cache().stats(),
+        "admission": get_limiter().stats(),
+    }
@@ -1,98 +1,127 @@
 import uuid
 from datetime import datetime
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 
-from ..db import get_db
-from ..models import EducationModule, EducationSection, EducationProgress
+from ..catalog import (
+    MAX_AGE_S,
+    Body,
+    accepts_gzip,
+    get_catalog,
+    sections_body,
+)
+from ..db import get_session
+from ..models import EducationSection, EducationProgress
+from ..schemas import (
+    ModuleOut,
+    ProgressMarked,
+    ProgressOut,
+    SectionOut,
+    columns,
+)
+from ..security import current_user
 
 
 router = APIRouter()
 
 
-@router.get("/modules", response_model=list[dict])
-def list_modules(db: Session = Depends(get_db)):
-    rows = db.scalars(
-        select(EducationModule).where(
-            EducationModule.is_published == True  # noqa: E712
-        )
-    ).all()
-    return [
-        {
-            "module_id": r.module_id,
-            "slug": r.slug,
-            "title": r.title,
-            "description": r.description,
-            "cover_url": r.cover_url,
-            "language": r.language,
-        }
-        for r in rows
-    ]
-
-
-@router.get("/modules/{module_id}/sections", response_model=list[dict])
-def list_sections(module_id: uuid.UUID, db: Session = Depends(get_db)):
-    rows = db.scalars(
+def sections_query(module_id):
+    # also EXPLAINed by bench/explain_indexes.py
+    return (
         select(EducationSection)
         .where(EducationSection.module_id == module_id)
         .order_by(EducationSection.order.asc())
-    ).all()
-    return [
-        {
-            "section_id": r.section_id,
-            "title": r.title,
-            "body_md": r.body_md,
-            "order": r.order,
-        }
-        for r in rows
-    ]
+    )
 
 
-@router.get("/progress", response_model=list[dict])
-def list_progress(user_id: uuid.UUID, db: Session = Depends(get_db)):
-    rows = db.scalars(
-        select(EducationProgress).where(EducationProgress.user_id == user_id)
-    ).all()
-    return [
-        {
-            "progress_id": r.progress_id,
-            "module_id": r.module_id,
-            "completed_at": r.completed_at,
-        }
-        for r in rows
-    ]
+def _send(request: Request, body: Body) -> Response:
+    gzip_ok = body.gz is not None and accepts_gzip(
+        request.headers.get("accept-encoding")
+    )
+    headers = {
+        "ETag": body.gz_etag if gzip_ok else body.etag,
+        "Cache-Control": f"public, max-age={MAX_AGE_S}",
+        "Vary": "Accept-Encoding",
+    }
+    if body.matches(request.headers.get("if-none-match")):
+        get_catalog().record_not_modified()
+        return Response(status_code=304, headers=headers)
+    if gzip_ok:
+        headers["Content-Encoding"] = "gzip"
+    return Response(
+        body.gz if gzip_ok else body.raw,
+        media_type="application/json",
+        headers=headers,
+    )
 
 
-@router.post("/progress/{module_id}", response_model=dict)
-def mark_completed(
-    user_id: uuid.UUID,
+@router.get("/modules", response_model=list[ModuleOut])
+async def list_modules(
+    request: Request, db: AsyncSession = Depends(get_session)
+):
+    return _send(request, await get_catalog().modules(db))
+
+
+@router.get(
+    "/modules/{module_id}/sections", response_model=list[SectionOut]
+)
+async def list_sections(
     module_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_session),
 ):
-    ex = db.scalar(
-        select(EducationProgress)
-        .where(EducationProgress.user_id == user_id)
-        .where(EducationProgress.module_id == module_id)
+    body = await get_catalog().sections(db, module_id)
+    if body is not None:
+        return _send(request, body)
+    # unpublished or unknown module, or EDU_CACHE=0
+    result = await db.scalars(sections_query(module_id))
+    return _send(request, sections_body(result.all()))
+
+
+@router.get(
+    "/progress",
+    response_model=list[ProgressOut],
+    dependencies=[Depends(current_user)],
+)
+async def list_progress(
+    user_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+):
+    result = await db.execute(
+        select(*columns(EducationProgress, ProgressOut)).where(
+            EducationProgress.user_id == user_id
+        )
     )
+    return result.all()
+
+
+@router.post(
+    "/progress/{module_id}",
+    response_model=ProgressMarked,
+    dependencies=[Depends(current_user)],
+)
+async def mark_completed(
+    user_id: uuid.UUID,
+    module_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+):
     now = datetime.utcnow()
-    if ex:
-        ex.completed_at = now
-        db.commit()
-        db.refresh(ex)
-        return {
-            "progress_id": ex.progress_id,
-            "completed_at": ex.completed_at,
-        }
-    obj = EducationProgress(
-        user_id=user_id,
-        module_id=module_id,
-        completed_at=now,
+    # one upsert on UNIQUE(user_id, module_id) instead of SELECT + write
+    stmt = insert(EducationProgress).values(
+        user_id=user_id, module_id=module_id, completed_at=now
     )
-    db.add(obj)
-    db.commit()
-    db.refresh(obj)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            EducationProgress.user_id,
+            EducationProgress.module_id,
+        ],
+        set_={"completed_at": stmt.excluded.completed_at},
+    ).returning(EducationProgress.progress_id, EducationProgress.completed_at)
+    row = (await db.execute(stmt)).one()
+    await db.commit()
     return {
-        "progress_id": obj.progress_id,
-        "completed_at": obj.completed_at,
+        "progress_id": row.progress_id,
+        "completed_at": row.completed_at,
     }
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+
+from .. import security
+from ..catalog import get_catalog
+from ..db import pool_status
+
+
+# Hidden from the OpenAPI schema but reachable through the /api proxy, so
+# the metrics need a service token like the other operator routes.
+router = APIRouter(dependencies=[Depends(security.require_service)])
+
+
+@router.get("/db/pool")
+def db_pool():
+    return pool_status()
+
+
+@router.get("/edu/cache")
+def edu_cache():
+    return get_catalog().stats()
+
+
+@router.get("/auth")
+def auth_stats():
+    return security.stats()
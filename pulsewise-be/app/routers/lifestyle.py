@@ -1,114 +1,244 @@
 import uuid
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from typing import Any, Optional
+
+from fastapi import APIRouter, Body, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from ..db import get_db
-from ..models import DailyActivity, DailyConsumption, DiarySymptom
+from ..bulk import bulk_insert, validate_rows
+from ..db import get_session
+from ..models import (
+    DailyActivity,
+    DailyConsumption,
+    DiarySymptom,
+    HeartDiary,
+)
+from ..pagination import keyset, page
+from ..schemas import (
+    ActivityCreate,
+    ActivityCreated,
+    ActivityOut,
+    BulkOut,
+    ConsumptionCreate,
+    ConsumptionCreated,
+    ConsumptionOut,
+    SymptomCreate,
+    SymptomCreated,
+    SymptomOut,
+    columns,
+)
+from ..security import Principal, current_user, get_owned
+
+
+router = APIRouter(dependencies=[Depends(current_user)])
+
+
+def _owned(stmt, model, user: Optional[Principal]):
+    # a diary_id of another user lists nothing, at no extra query
+    if user is None:
+        return stmt
+    return stmt.join(HeartDiary, HeartDiary.diary_id == model.diary_id).where(
+        HeartDiary.user_id == user.user_id
+    )
 
 
-router = APIRouter()
+def _page(model, out, id_col, diary_id, user, cursor, limit):
+    return keyset(
+        _owned(
+            select(*columns(model, out)).where(model.diary_id == diary_id),
+            model,
+            user,
+        ),
+        model.occurred_at,
+        id_col,
+        cursor,
+        limit,
+    )
 
 
-@router.get("/activities", response_model=list[dict])
-def list_activities(
+# The list queries, also EXPLAINed by bench/explain_indexes.py
+def activities_query(
+    diary_id, user: Optional[Principal], cursor=None, limit: int = 100
+):
+    return _page(
+        DailyActivity,
+        ActivityOut,
+        DailyActivity.activity_id,
+        diary_id,
+        user,
+        cursor,
+        limit,
+    )
+
+
+def consumptions_query(
+    diary_id, user: Optional[Principal], cursor=None, limit: int = 100
+):
+    return _page(
+        DailyConsumption,
+        ConsumptionOut,
+        DailyConsumption.consumption_id,
+        diary_id,
+        user,
+        cursor,
+        limit,
+    )
+
+
+def symptoms_query(
+    diary_id, user: Optional[Principal], cursor=None, limit: int = 100
+):
+    return _page(
+        DiarySymptom,
+        SymptomOut,
+        DiarySymptom.symptom_id,
+        diary_id,
+        user,
+        cursor,
+        limit,
+    )
+
+
+@router.get("/activities", response_model=list[ActivityOut])
+async def list_activities(
     diary_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    rows = db.scalars(
-        select(DailyActivity).where(DailyActivity.diary_id == diary_id)
-    ).all()
-    return [
-        {
-            "activity_id": r.activity_id,
-            "name": r.name,
-            "duration_min": r.duration_min,
-            "heart_rate": r.heart_rate,
-            "user_feeling": r.user_feeling,
-            "note": r.note,
-            "occurred_at": r.occurred_at,
-        }
-        for r in rows
-    ]
-
-
-@router.post("/activities", response_model=dict)
-def add_activity(
+    result = await db.execute(
+        activities_query(diary_id, user, cursor, limit)
+    )
+    return page(
+        result.all(), limit, response, "occurred_at", "activity_id"
+    )
+
+
+@router.post("/activities", response_model=ActivityCreated)
+async def add_activity(
     diary_id: uuid.UUID,
-    body: dict,
-    db: Session = Depends(get_db),
+    body: ActivityCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    obj = DailyActivity(diary_id=diary_id, **body)
+    await get_owned(db, HeartDiary, diary_id, user, "Diary not found")
+    obj = DailyActivity(diary_id=diary_id, **body.model_dump())
     db.add(obj)
-    db.commit()
-    db.refresh(obj)
+    await db.commit()
     return {"activity_id": obj.activity_id}
 
 
-@router.get("/consumptions", response_model=list[dict])
-def list_consumptions(
+@router.get("/consumptions", response_model=list[ConsumptionOut])
+async def list_consumptions(
     diary_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    rows = db.scalars(
-        select(DailyConsumption).where(DailyConsumption.diary_id == diary_id)
-    ).all()
-    return [
-        {
-            "consumption_id": r.consumption_id,
-            "type": r.type,
-            "name": r.name,
-            "portion": r.portion,
-            "sodium_mg": r.sodium_mg,
-            "fluid_ml": r.fluid_ml,
-            "note": r.note,
-            "occurred_at": r.occurred_at,
-        }
-        for r in rows
-    ]
-
-
-@router.post("/consumptions", response_model=dict)
-def add_consumption(
+    result = await db.execute(
+        consumptions_query(diary_id, user, cursor, limit)
+    )
+    return page(
+        result.all(), limit, response, "occurred_at", "consumption_id"
+    )
+
+
+@router.post("/consumptions", response_model=ConsumptionCreated)
+async def add_consumption(
     diary_id: uuid.UUID,
-    body: dict,
-    db: Session = Depends(get_db),
+    body: ConsumptionCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    obj = DailyConsumption(diary_id=diary_id, **body)
+    await get_owned(db, HeartDiary, diary_id, user, "Diary not found")
+    obj = DailyConsumption(diary_id=diary_id, **body.model_dump())
     db.add(obj)
-    db.commit()
-    db.refresh(obj)
+    await db.commit()
     return {"consumption_id": obj.consumption_id}
 
 
-@router.get("/symptoms", response_model=list[dict])
-def list_symptoms(
+@router.get("/symptoms", response_model=list[SymptomOut])
+async def list_symptoms(
     diary_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = None,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    rows = db.scalars(
-        select(DiarySymptom).where(DiarySymptom.diary_id == diary_id)
-    ).all()
-    return [
-        {
-            "symptom_id": r.symptom_id,
-            "type": r.type,
-            "severity": r.severity,
-            "note": r.note,
-            "occurred_at": r.occurred_at,
-        }
-        for r in rows
-    ]
-
-
-@router.post("/symptoms", response_model=dict)
-def add_symptom(
+    result = await db.execute(
+        symptoms_query(diary_id, user, cursor, limit)
+    )
+    return page(
+        result.all(), limit, response, "occurred_at", "symptom_id"
+    )
+
+
+@router.post("/symptoms", response_model=SymptomCreated)
+async def add_symptom(
     diary_id: uuid.UUID,
-    body: dict,
-    db: Session = Depends(get_db),
+    body: SymptomCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    obj = DiarySymptom(diary_id=diary_id, **body)
+    await get_owned(db, HeartDiary, diary_id, user, "Diary not found")
+    obj = DiarySymptom(diary_id=diary_id, **body.model_dump())
     db.add(obj)
-    db.commit()
-    db.refresh(obj)
+    await db.commit()
     return {"symptom_id": obj.symptom_id}
+
+
+async def _bulk(
+    db, user, diary_id, body, schema, model, id_attr
+) -> BulkOut:
+    await get_owned(db, HeartDiary, diary_id, user, "Diary not found")
+    indices, rows, errors = validate_rows(body, schema, diary_id=diary_id)
+    return await bulk_insert(
+        db, model, id_attr, len(body), indices, rows, errors
+    )
+
+
+@router.post("/activities/bulk", response_model=BulkOut)
+async def add_activities_bulk(
+    diary_id: uuid.UUID,
+    body: list[Any] = Body(...),
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    return await _bulk(
+        db, user, diary_id, body, ActivityCreate, DailyActivity, "activity_id"
+    )
+
+
+@router.post("/consumptions/bulk", response_model=BulkOut)
+async def add_consumptions_bulk(
+    diary_id: uuid.UUID,
+    body: list[Any] = Body(...),
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    return await _bulk(
+        db,
+        user,
+        diary_id,
+        body,
+        ConsumptionCreate,
+        DailyConsumption,
+        "consumption_id",
+    )
+
+
+@router.post("/symptoms/bulk", response_model=BulkOut)
+async def add_symptoms_bulk(
+    diary_id: uuid.UUID,
+    body: list[Any] = Body(...),
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    return await _bulk(
+        db, user, diary_id, body, SymptomCreate, DiarySymptom, "symptom_id"
+    )
@@ -1,117 +1,373 @@
 import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from ..db import get_db
-from ..models import Medication, MedicationSchedule, MedicationLog
+from .. import adherence, schedules
+from ..db import get_session
+from ..models import (
+    Medication,
+    MedicationAdherenceDaily,
+    MedicationLog,
+    MedicationSchedule,
+)
+from ..pagination import keyset, page
+from ..schemas import (
+    DoseOut,
+    MedicationCreate,
+    MedicationCreated,
+    MedicationLogCreate,
+    MedicationLogCreated,
+    MedicationLogOut,
+    MedicationOut,
+    ScheduleCreate,
+    ScheduleCreated,
+    ScheduleOut,
+    columns,
+)
+from ..security import (
+    Principal,
+    current_user,
+    ensure_self,
+    get_owned,
+    require_service,
+)
 
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(current_user)])
+# the reminder dispatcher's routes, across all users; served under /meds too
+dispatch = APIRouter(dependencies=[Depends(require_service)])
 
+_NOT_FOUND = "Medication not found"
 
-@router.get("", response_model=list[dict])
-def list_meds(user_id: uuid.UUID, db: Session = Depends(get_db)):
-    rows = db.scalars(
-        select(Medication).where(Medication.user_id == user_id)
-    ).all()
-    return [
-        {
-            "medication_id": r.medication_id,
-            "user_id": r.user_id,
-            "name": r.name,
-            "description": r.description,
-            "condition_tag": r.condition_tag,
-            "dosage_amount": (
-                float(r.dosage_amount) if r.dosage_amount is not None else None
+
+def _owned(stmt, model, user: Optional[Principal]):
+    # a medication_id of another user lists nothing, at no extra query
+    if user is None:
+        return stmt
+    return stmt.join(
+        Medication, Medication.medication_id == model.medication_id
+    ).where(Medication.user_id == user.user_id)
+
+
+# The list queries, also EXPLAINed by bench/explain_indexes.py
+def meds_query(user_id):
+    return select(*columns(Medication, MedicationOut)).where(
+        Medication.user_id == user_id
+    )
+
+
+def schedules_query(medication_id, user: Optional[Principal]):
+    return _owned(
+        select(*columns(MedicationSchedule, ScheduleOut)).where(
+            MedicationSchedule.medication_id == medication_id
+        ),
+        MedicationSchedule,
+        user,
+    )
+
+
+def logs_query(
+    medication_id, user: Optional[Principal], cursor=None, limit: int = 100
+):
+    return keyset(
+        _owned(
+            select(*columns(MedicationLog, MedicationLogOut)).where(
+                MedicationLog.medication_id == medication_id
             ),
-            "dosage_unit": r.dosage_unit,
-            "route": r.route,
-            "active": r.active,
-            "start_date": r.start_date,
-            "end_date": r.end_date,
-        }
-        for r in rows
-    ]
+            MedicationLog,
+            user,
+        ),
+        MedicationLog.taken_at,
+        MedicationLog.medication_log_id,
+        cursor,
+        limit,
+    )
+
+
+@router.get("", response_model=list[MedicationOut])
+async def list_meds(
+    user_id: uuid.UUID,
+    db: AsyncSession = Depends(get_session),
+):
+    result = await db.execute(meds_query(user_id))
+    return result.all()
 
 
-@router.post("", response_model=dict)
-def create_med(body: dict, db: Session = Depends(get_db)):
-    m = Medication(**body)
+@router.post("", response_model=MedicationCreated)
+async def create_med(
+    body: MedicationCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    if body.user_id is None:
+        if user is None:
+            raise HTTPException(400, "user_id is required")
+        body.user_id = user.user_id
+    ensure_self(user, body.user_id)
+    m = Medication(**body.model_dump())
     db.add(m)
-    db.commit()
-    db.refresh(m)
+    await db.commit()
     return {"medication_id": m.medication_id}
 
 
-@router.get("/{medication_id}/schedules", response_model=list[dict])
-def list_schedules(medication_id: uuid.UUID, db: Session = Depends(get_db)):
-    rows = db.scalars(
-        select(MedicationSchedule).where(
-            MedicationSchedule.medication_id == medication_id
+def _dose(planned: datetime, sc: MedicationSchedule, med: Medication) -> dict:
+    return {
+        "planned_at": planned,
+        "remind_at": planned + schedules.remind_delta(sc),
+        "schedule_id": sc.schedule_id,
+        "medication_id": med.medication_id,
+        "user_id": med.user_id,
+        "name": med.name,
+        "dosage_amount": med.dosage_amount,
+        "dosage_unit": med.dosage_unit,
+        "route": med.route,
+    }
+
+
+# next_fire_at(sc, at - _TICK) is the first reminder at or after ``at``
+_TICK = timedelta(microseconds=1)
+
+
+def _due(until: datetime, limit: int):
+    # range scan on ix_medication_schedules_next_fire
+    return (
+        select(MedicationSchedule, Medication)
+        .join(
+            Medication,
+            Medication.medication_id == MedicationSchedule.medication_id,
+        )
+        .where(MedicationSchedule.next_fire_at <= until)
+        .order_by(MedicationSchedule.next_fire_at)
+        .limit(limit)
+    )
+
+
+@router.get("/upcoming", response_model=list[DoseOut])
+async def upcoming_doses(
+    user_id: uuid.UUID,
+    start: datetime | None = None,
+    hours: int = Query(24, ge=1, le=24 * 14),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_session),
+):
+    start = start or datetime.now(timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = start + timedelta(hours=hours)
+    result = await db.execute(
+        select(MedicationSchedule, Medication)
+        .join(
+            Medication,
+            Medication.medication_id == MedicationSchedule.medication_id,
         )
-    ).all()
+        .where(Medication.user_id == user_id)
+        .where(Medication.active.is_(True))
+        .where(MedicationSchedule.as_needed.is_(False))
+    )
+    rows = result.all()
+    meds = {sc.schedule_id: med for sc, med in rows}
     return [
-        {
-            "schedule_id": r.schedule_id,
-            "time_of_day": r.time_of_day,
-            "days_of_week": r.days_of_week,
-            "timezone": r.timezone,
-            "as_needed": r.as_needed,
-            "interval_days": r.interval_days,
-            "remind_offset_min": r.remind_offset_min,
-            "start_date": r.start_date,
-            "end_date": r.end_date,
-        }
-        for r in rows
+        _dose(planned, sc, meds[sc.schedule_id])
+        for planned, sc in schedules.expand(
+            [sc for sc, _ in rows],
+            start,
+            end,
+            limit,
+            meds=[med for _, med in rows],
+        )
     ]
 
 
-@router.post("/{medication_id}/schedules", response_model=dict)
-def create_schedule(
-    medication_id: uuid.UUID, body: dict, db: Session = Depends(get_db)
+@dispatch.get("/due", response_model=list[DoseOut])
+async def due_doses(
+    within_min: int = Query(5, ge=0, le=24 * 60),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_session),
 ):
-    sc = MedicationSchedule(medication_id=medication_id, **body)
+    """Reminders firing in the next ``within_min`` minutes, all users.
+
+    Read-only; ``next_fire_at`` only moves forward when reminders are
+    claimed, so rows left in the past are rolled forward here, and each
+    time is re-checked against the medication's start and end dates.
+    """
+    now = datetime.now(timezone.utc)
+    until = now + timedelta(minutes=within_min)
+    result = await db.execute(
+        _due(until, limit).where(Medication.active.is_(True))
+    )
+    out = []
+    for sc, med in result.all():
+        fire = schedules.next_fire_at(
+            sc, max(sc.next_fire_at, now) - _TICK, med
+        )
+        if fire is None or fire > until:
+            continue
+        out.append(_dose(fire - schedules.remind_delta(sc), sc, med))
+    out.sort(key=lambda d: d["remind_at"])
+    return out
+
+
+@dispatch.post("/due/claim", response_model=list[DoseOut])
+async def claim_due(
+    within_min: int = Query(5, ge=0, le=24 * 60),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_session),
+):
+    """Hand out reminders firing in the next ``within_min`` minutes and
+    advance their schedules, for a reminder dispatcher polling this route.
+
+    Rows are locked with ``SKIP LOCKED``, so concurrent dispatchers never
+    claim the same reminder. A reminder whose time already passed is
+    still returned (``remind_at`` in the past) and the schedule moves on
+    to its next dose after now. Schedules of inactive or ended medications
+    are cleared, and ones not started yet move to their first dose.
+    """
+    now = datetime.now(timezone.utc)
+    until = now + timedelta(minutes=within_min)
+    result = await db.execute(
+        _due(until, limit).with_for_update(
+            of=MedicationSchedule, skip_locked=True
+        )
+    )
+    claimed = []
+    for sc, med in result.all():
+        fire = schedules.next_fire_at(sc, sc.next_fire_at - _TICK, med)
+        if fire is None or fire > until:
+            sc.next_fire_at = fire
+            continue
+        claimed.append(_dose(fire - schedules.remind_delta(sc), sc, med))
+        sc.next_fire_at = schedules.next_fire_at(sc, max(fire, now), med)
+    await db.commit()
+    return claimed
+
+
+@router.get("/adherence", response_model=dict)
+async def adherence_report(
+    user_id: uuid.UUID,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    bucket: Literal["day", "week"] = "day",
+    medication_id: uuid.UUID | None = None,
+    db: AsyncSession = Depends(get_session),
+):
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to or (date_to - date_from).days > 366:
+        raise HTTPException(400, "date range must be 1 to 367 days")
+
+    stmt = select(Medication).where(Medication.user_id == user_id)
+    if medication_id is not None:
+        stmt = stmt.where(Medication.medication_id == medication_id)
+    meds = (await db.scalars(stmt)).all()
+    ids = [m.medication_id for m in meds]
+    scs: dict[uuid.UUID, list] = {i: [] for i in ids}
+    counters: dict[uuid.UUID, dict] = {i: {} for i in ids}
+    if ids:
+        result = await db.scalars(
+            select(MedicationSchedule)
+            .where(MedicationSchedule.medication_id.in_(ids))
+            .where(MedicationSchedule.as_needed.is_(False))
+        )
+        for sc in result.all():
+            scs[sc.medication_id].append(sc)
+        # primary-key range scan: one row per medication and day
+        result = await db.scalars(
+            select(MedicationAdherenceDaily)
+            .where(MedicationAdherenceDaily.medication_id.in_(ids))
+            .where(MedicationAdherenceDaily.day.between(date_from, date_to))
+        )
+        for row in result.all():
+            counters[row.medication_id][row.day] = row
+
+    now = datetime.now(timezone.utc)
+    reports = [
+        adherence.medication_report(
+            m,
+            scs[m.medication_id],
+            counters[m.medication_id],
+            date_from,
+            date_to,
+            now,
+            bucket,
+        )
+        for m in meds
+    ]
+    return {
+        "user_id": user_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "bucket": bucket,
+        "on_time_min": adherence.ON_TIME_MIN,
+        "totals": adherence.totals(reports),
+        "medications": reports,
+    }
+
+
+@router.get("/{medication_id}/schedules", response_model=list[ScheduleOut])
+async def list_schedules(
+    medication_id: uuid.UUID,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    result = await db.execute(schedules_query(medication_id, user))
+    return result.all()
+
+
+@router.post(
+    "/{medication_id}/schedules", response_model=ScheduleCreated
+)
+async def create_schedule(
+    medication_id: uuid.UUID,
+    body: ScheduleCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
+):
+    med = await get_owned(db, Medication, medication_id, user, _NOT_FOUND)
+    sc = MedicationSchedule(medication_id=medication_id, **body.model_dump())
+    try:
+        sc.next_fire_at = schedules.next_fire_at(
+            sc, datetime.now(timezone.utc), med
+        )
+    except (KeyError, ValueError):
+        # unknown time zone (ZoneInfoNotFoundError is a KeyError)
+        raise HTTPException(400, "Invalid schedule")
     db.add(sc)
-    db.commit()
-    db.refresh(sc)
+    await db.commit()
     return {"schedule_id": sc.schedule_id}
 
 
-@router.get("/{medication_id}/logs", response_model=list[dict])
-def list_logs(
+@router.get("/{medication_id}/logs", response_model=list[MedicationLogOut])
+async def list_logs(
     medication_id: uuid.UUID,
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    rows = db.scalars(
-        select(MedicationLog)
-        .where(MedicationLog.medication_id == medication_id)
-        .order_by(MedicationLog.taken_at.desc())
-        .limit(limit)
-    ).all()
-    return [
-        {
-            "medication_log_id": r.medication_log_id,
-            "schedule_id": r.schedule_id,
-            "planned_at": r.planned_at,
-            "taken_at": r.taken_at,
-            "taken": r.taken,
-            "notes": r.notes,
-        }
-        for r in rows
-    ]
+    result = await db.execute(
+        logs_query(medication_id, user, cursor, limit)
+    )
+    return page(
+        result.all(), limit, response, "taken_at", "medication_log_id"
+    )
 
 
-@router.post("/{medication_id}/logs", response_model=dict)
-def create_log(
-    medication_id: uuid.UUID, body: dict, db: Session = Depends(get_db)
+@router.post(
+    "/{medication_id}/logs", response_model=MedicationLogCreated
+)
+async def create_log(
+    medication_id: uuid.UUID,
+    body: MedicationLogCreate,
+    user: Optional[Principal] = Depends(current_user),
+    db: AsyncSession = Depends(get_session),
 ):
-    lg = MedicationLog(
-        medication_id=medication_id, **body
-    )
+    await get_owned(db, Medication, medication_id, user, _NOT_FOUND)
+    lg = MedicationLog(medication_id=medication_id, **body.model_dump())
     db.add(lg)
-    db.commit()
-    db.refresh(lg)
+    await db.commit()
     return {"medication_log_id": lg.medication_log_id}
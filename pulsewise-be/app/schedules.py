@@ -0,0 +1,136 @@
+"""Expands ``MedicationSchedule`` rows into concrete dose times.
+
+Doses are computed in the schedule's own time zone, so an 08:00 dose stays
+at 08:00 local time across DST changes. A local time that falls into a DST
+gap is moved forward by the length of the gap; an ambiguous one (clocks
+going back) uses its first occurrence. All returned datetimes are UTC.
+
+``medication_schedules.next_fire_at`` caches :func:`next_fire_at` so the
+"what is due in the next N minutes" query is a range scan on its index.
+
+Functions taking ``med`` also honour the medication: an inactive one plans
+nothing, and doses stay between its ``start_date`` and ``end_date`` (as in
+:func:`app.adherence.planned_doses`).
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from heapq import merge
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo
+
+# column default of medication_schedules.timezone
+DEFAULT_TZ = "Asia/Jakarta"
+
+
+def _parse(value, cls):
+    # rows built from a request body still hold the JSON strings
+    return cls.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _anchor(sc, tz: ZoneInfo) -> date:
+    # day 0 of an every-N-days schedule without a start_date
+    created = sc.created_at or datetime.now(timezone.utc)
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created.astimezone(tz).date()
+
+
+def _bound(a: Optional[date], b: Optional[date], pick) -> Optional[date]:
+    return a if b is None else b if a is None else pick(a, b)
+
+
+def _days(sc, tz: ZoneInfo, first: date, med=None) -> Iterator[date]:
+    # local dates with a dose, on or after ``first``
+    step = max(sc.interval_days or 1, 1)
+    sc_start = _parse(sc.start_date, date)
+    start, end = sc_start, _parse(sc.end_date, date)
+    if med is not None:
+        start = _bound(start, _parse(med.start_date, date), max)
+        end = _bound(end, _parse(med.end_date, date), min)
+    weekdays = set(sc.days_of_week) if sc.days_of_week else None
+    day = first if start is None else max(first, start)
+    if step > 1:
+        # every N days counts from the schedule's own start
+        anchor = sc_start or _anchor(sc, tz)
+        day += timedelta(days=-(day - anchor).days % step)
+    misses = 0
+    while end is None or day <= end:
+        if weekdays is None or day.isoweekday() in weekdays:
+            misses = 0
+            yield day
+        else:
+            # stepping by N days visits every reachable weekday within 7
+            # steps; 7 misses in a row means none of them is selected
+            misses += 1
+            if misses == 7:
+                return
+        day += timedelta(days=step)
+
+
+def doses(
+    sc, start: datetime, end: Optional[datetime] = None, med=None
+) -> Iterator[datetime]:
+    """Planned dose times of ``sc`` in ``[start, end)``, in order.
+
+    As-needed (PRN) schedules have none. Unbounded when ``end`` is None and
+    neither the schedule nor ``med`` has an ``end_date``.
+    """
+    if sc.as_needed or sc.time_of_day is None:
+        return
+    if med is not None and not med.active:
+        return
+    tz = ZoneInfo(sc.timezone or DEFAULT_TZ)
+    at = _parse(sc.time_of_day, time).replace(tzinfo=None)
+    for day in _days(sc, tz, start.astimezone(tz).date(), med):
+        planned = datetime.combine(day, at, tzinfo=tz).astimezone(
+            timezone.utc
+        )
+        if end is not None and planned >= end:
+            return
+        if planned >= start:
+            yield planned
+
+
+def remind_delta(sc) -> timedelta:
+    """Reminder time minus dose time (``remind_offset_min``, e.g. -15)."""
+    return timedelta(minutes=sc.remind_offset_min or 0)
+
+
+def next_fire_at(sc, after: datetime, med=None) -> Optional[datetime]:
+    """First reminder time strictly after ``after``, or None when the
+    schedule has no doses left."""
+    delta = remind_delta(sc)
+    for planned in doses(sc, after - delta, med=med):
+        if planned + delta > after:
+            return planned + delta
+    return None
+
+
+def _tagged(i: int, sc, start: datetime, end: datetime, med):
+    for planned in doses(sc, start, end, med):
+        yield planned, i, sc
+
+
+def expand(
+    schedules: Iterable,
+    start: datetime,
+    end: datetime,
+    limit: Optional[int] = None,
+    meds: Optional[Iterable] = None,
+) -> list[tuple[datetime, object]]:
+    """``(planned_at, schedule)`` for every dose of ``schedules`` in
+    ``[start, end)``, earliest first, stopping after ``limit`` doses.
+    ``meds``, if given, holds each schedule's medication, in order.
+
+    Each schedule's doses are generated lazily and merged through a heap,
+    so only the first ``limit`` doses are ever computed.
+    """
+    schedules = list(schedules)
+    meds = list(meds) if meds is not None else [None] * len(schedules)
+    streams = [
+        _tagged(i, sc, start, end, med)
+        for i, (sc, med) in enumerate(zip(schedules, meds))
+    ]
+    return [
+        (planned, sc) for planned, _, sc in islice(merge(*streams), limit)
+    ]
@@ -1,7 +1,19 @@
 import uuid
-from datetime import date, datetime
-from typing import Annotated
+from datetime import date, datetime, time
+from typing import Annotated, Any, Literal
 from pydantic import BaseModel, Field, conint, ConfigDict
+from sqlalchemy import inspect
+
+
+def columns(model, schema: type[BaseModel]) -> list:
+    """The columns of ``model`` behind the fields of ``schema``.
+
+    List routes select these instead of the entity: the result rows go
+    straight into the ``from_attributes`` response model without building
+    (and tracking) an ORM object per row.
+    """
+    mapper = inspect(model)
+    return [mapper.columns[name] for name in schema.model_fields]
 
 
 # ---- Diaries
@@ -55,6 +67,249 @@ class VitalOut(BaseModel):
     body_temp_c: float | None
 
 
+# ---- Lifestyle
+class ActivityCreate(BaseModel):
+    name: str
+    duration_min: int
+    heart_rate: Annotated[int, Field(ge=20, le=250)] | None = None
+    user_feeling: (
+        Literal["very_bad", "bad", "neutral", "good", "very_good"] | None
+    ) = None
+    note: str | None = None
+    occurred_at: datetime
+
+
+class ConsumptionCreate(BaseModel):
+    type: Literal["Food", "Drink"]
+    name: str
+    portion: str | None = None
+    sodium_mg: int | None = None
+    fluid_ml: int | None = None
+    note: str | None = None
+    occurred_at: datetime
+
+
+class SymptomCreate(BaseModel):
+    type: Literal[
+        "shortness_of_breath",
+        "chest_pain",
+        "palpitations",
+        "fatigue",
+        "dizziness",
+        "swelling",
+        "weight_gain",
+        "orthopnea",
+        "other",
+    ]
+    severity: Annotated[int, Field(ge=0, le=4)]
+    note: str | None = None
+    occurred_at: datetime
+
+
+class ActivityOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    activity_id: uuid.UUID
+    name: str
+    duration_min: int
+    heart_rate: int | None
+    user_feeling: str | None
+    note: str | None
+    occurred_at: datetime
+
+
+class ConsumptionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    consumption_id: uuid.UUID
+    type: str
+    name: str
+    portion: str | None
+    sodium_mg: int | None
+    fluid_ml: int | None
+    note: str | None
+    occurred_at: datetime
+
+
+class SymptomOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    symptom_id: uuid.UUID
+    type: str
+    severity: int
+    note: str | None
+    occurred_at: datetime
+
+
+class ActivityCreated(BaseModel):
+    activity_id: uuid.UUID
+
+
+class ConsumptionCreated(BaseModel):
+    consumption_id: uuid.UUID
+
+
+class SymptomCreated(BaseModel):
+    symptom_id: uuid.UUID
+
+
+# ---- Medications
+class MedicationCreate(BaseModel):
+    # the token's user when omitted
+    user_id: uuid.UUID | None = None
+    name: str
+    description: str | None = None
+    condition_tag: str | None = None
+    dosage_amount: float | None = None
+    dosage_unit: str | None = None
+    route: (
+        Literal[
+            "oral",
+            "sublingual",
+            "inhalation",
+            "topical",
+            "intravenous",
+            "other",
+        ]
+        | None
+    ) = None
+    active: bool = True
+    start_date: date | None = None
+    end_date: date | None = None
+
+
+class MedicationOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    medication_id: uuid.UUID
+    user_id: uuid.UUID
+    name: str
+    description: str | None
+    condition_tag: str | None
+    dosage_amount: float | None
+    dosage_unit: str | None
+    route: str | None
+    active: bool
+    start_date: date | None
+    end_date: date | None
+
+
+class MedicationCreated(BaseModel):
+    medication_id: uuid.UUID
+
+
+class ScheduleCreate(BaseModel):
+    time_of_day: time
+    # 1=Mon .. 7=Sun; None is every day
+    days_of_week: list[Annotated[int, Field(ge=1, le=7)]] | None = None
+    timezone: str = "Asia/Jakarta"
+    as_needed: bool = False
+    interval_days: Annotated[int, Field(ge=1)] = 1
+    remind_offset_min: int | None = None
+    start_date: date | None = None
+    end_date: date | None = None
+
+
+class ScheduleOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    schedule_id: uuid.UUID
+    time_of_day: time | None
+    days_of_week: list[int] | None
+    timezone: str
+    as_needed: bool
+    interval_days: int
+    remind_offset_min: int | None
+    start_date: date | None
+    end_date: date | None
+    next_fire_at: datetime | None
+
+
+class ScheduleCreated(BaseModel):
+    schedule_id: uuid.UUID
+
+
+class MedicationLogCreate(BaseModel):
+    schedule_id: uuid.UUID | None = None
+    planned_at: datetime | None = None
+    taken_at: datetime
+    taken: bool = True
+    notes: str | None = None
+
+
+class MedicationLogOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    medication_log_id: uuid.UUID
+    schedule_id: uuid.UUID | None
+    planned_at: datetime | None
+    taken_at: datetime
+    taken: bool
+    notes: str | None
+
+
+class MedicationLogCreated(BaseModel):
+    medication_log_id: uuid.UUID
+
+
+class DoseOut(BaseModel):
+    planned_at: datetime
+    remind_at: datetime
+    schedule_id: uuid.UUID
+    medication_id: uuid.UUID
+    user_id: uuid.UUID
+    name: str
+    dosage_amount: float | None
+    dosage_unit: str | None
+    route: str | None
+
+
+# ---- Education
+class ModuleOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    module_id: uuid.UUID
+    slug: str
+    title: str
+    description: str | None
+    cover_url: str | None
+    language: str | None
+
+
+class SectionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    section_id: uuid.UUID
+    title: str
+    body_md: str | None
+    order: int
+
+
+class ProgressOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    progress_id: uuid.UUID
+    module_id: uuid.UUID
+    completed_at: datetime | None
+
+
+class ProgressMarked(BaseModel):
+    progress_id: uuid.UUID
+    completed_at: datetime | None
+
+
+# ---- Diary day view
+class DiaryFullOut(DiaryOut):
+    vitals: list[VitalOut]
+    activities: list[ActivityOut]
+    consumptions: list[ConsumptionOut]
+    symptoms: list[SymptomOut]
+
+
+# ---- Bulk ingest
+class BulkRowError(BaseModel):
+    index: int
+    errors: list[dict[str, Any]]
+
+
+class BulkOut(BaseModel):
+    inserted: int
+    # one entry per submitted row, None where the row was rejected
+    ids: list[uuid.UUID | None]
+    errors: list[BulkRowError]
+
+
 # ---- Auth / Users
 
 
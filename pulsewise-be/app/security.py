@@ -0,0 +1,300 @@
+"""Bearer-token auth for the API routes and the bcrypt executor.
+
+Access tokens are HS256 JWTs issued by ``/auth/login``. A verified token's
+claims are cached (keyed on the token string) until its ``exp``, and the
+routes trust those claims instead of loading the ``User`` row, so a
+repeated token costs one dict lookup. A deleted user's tokens therefore
+stay usable until they expire (``JWT_EXPIRE_MIN``).
+
+bcrypt runs on its own small thread pool rather than the shared one the
+sync database sessions (``DB_ASYNC=0``) and ``def`` routes use, with a
+bound on queued hashes past which ``/auth`` answers 503.
+"""
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+
+JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change-me")
+JWT_ALG = "HS256"
+JWT_EXPIRE_MIN = int(os.getenv("JWT_EXPIRE_MIN", "60"))
+# "0" lets requests without a token through (with one, it is still checked)
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "1") == "1"
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
+SERVICE_SCOPE = "service"
+
+# python-jose and passlib add ~100 ms to a cold import, so they load on
+# the first token / password instead (see bench/import_time.py)
+pwd_ctx = None  # passlib CryptContext, built by _crypt()
+
+
+def _crypt():
+    global pwd_ctx
+    # only called from the event loop, so no lock
+    if pwd_ctx is None:
+        from passlib.context import CryptContext
+
+        pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return pwd_ctx
+
+
+class Principal:
+    """The caller, as stated by the claims of a verified token."""
+
+    __slots__ = ("user_id", "username", "email", "scope", "exp")
+
+    def __init__(self, claims: dict):
+        sub = claims["sub"]
+        self.scope = claims.get("scope")
+        # service tokens name a client, not a user
+        self.user_id = None if self.scope == SERVICE_SCOPE else uuid.UUID(sub)
+        self.username = claims.get("username")
+        self.email = claims.get("email")
+        self.exp = float(claims["exp"])
+
+
+class TokenCache:
+    """LRU of verified tokens; an entry is dropped at its token's ``exp``."""
+
+    def __init__(self, size: int = TOKEN_CACHE_SIZE):
+        self.size = size
+        self._entries: OrderedDict[str, Principal] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+    def verify(self, token: str) -> Principal:
+        now = time.time()
+        with self._lock:
+            p = self._entries.get(token)
+            if p is not None:
+                if p.exp > now:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return p
+                del self._entries[token]
+                self.expirations += 1
+            self.misses += 1
+        from jose import JWTError, jwt
+
+        try:
+            # checks the signature and exp
+            p = Principal(
+                jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+            )
+        except (JWTError, KeyError, ValueError):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                401,
+                "Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if self.size > 0:
+            with self._lock:
+                self._entries[token] = p
+                if len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return p
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self.size,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rejected": self.rejected,
+            }
+
+
+_CACHE: Optional[TokenCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_token_cache() -> TokenCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = TokenCache()
+    return _CACHE
+
+
+def create_token(claims: dict, minutes: int = JWT_EXPIRE_MIN) -> str:
+    from jose import jwt
+
+    now = int(time.time())
+    payload = {**claims, "iat": now, "exp": now + minutes * 60}
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
+
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def current_user(
+    request: Request,
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[Principal]:
+    """Router dependency: verify the bearer token and, when the route takes
+    a ``user_id`` query parameter, require it to be the token's user.
+
+    Routes addressed by ``diary_id`` / ``medication_id`` check the owner of
+    that row themselves (``get_owned`` or a ``user_id`` filter).
+    """
+    if creds is None:
+        if AUTH_REQUIRED:
+            raise HTTPException(
+                401,
+                "Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return None
+    p = get_token_cache().verify(creds.credentials)
+    if p.user_id is None:
+        raise HTTPException(403, "User token required")
+    user_id = request.query_params.get("user_id")
+    if user_id is not None:
+        ensure_self(p, user_id)
+    return p
+
+
+def ensure_self(p: Optional[Principal], user_id) -> None:
+    """403 unless ``user_id`` is the caller's (no-op without a token); 400
+    when it is missing or malformed rather than skipping the check."""
+    if p is None:
+        return
+    if user_id is None:
+        raise HTTPException(400, "user_id is required")
+    try:
+        same = p.user_id is not None and p.user_id == uuid.UUID(str(user_id))
+    except ValueError:
+        raise HTTPException(400, "Invalid user_id")
+    if not same:
+        raise HTTPException(403, "Token does not belong to this user")
+
+
+async def get_owned(
+    db, model, ident, user: Optional[Principal], detail: str, **kw
+):
+    """Load ``model`` by primary key: 404 (``detail``) when missing, 403
+    when its ``user_id`` is not the caller's."""
+    row = await db.get(model, ident, **kw)
+    if row is None:
+        raise HTTPException(404, detail)
+    ensure_self(user, row.user_id)
+    return row
+
+
+async def require_service(
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Principal:
+    """Routes for background workers and operators (the reminder
+    dispatcher, ``/internal``, ``/ecg/stats``): a token with ``scope:
+    service`` (``python -m app.security <client>``). Required even with
+    ``AUTH_REQUIRED=0``."""
+    if creds is None:
+        raise HTTPException(
+            401,
+            "Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    p = get_token_cache().verify(creds.credentials)
+    if p.scope != SERVICE_SCOPE:
+        raise HTTPException(403, "Service token required")
+    return p
+
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+_pending = 0
+_shed = 0
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt"
+                )
+    return _EXECUTOR
+
+
+async def _run_bcrypt(fn, *args):
+    global _pending, _shed
+    # only touched from the event loop, so no lock
+    if _pending >= BCRYPT_MAX_PENDING:
+        _shed += 1
+        raise HTTPException(
+            503, "Too many logins, retry shortly", headers={"Retry-After": "1"}
+        )
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor(), fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(pw: str) -> str:
+    return await _run_bcrypt(_crypt().hash, pw)
+
+
+async def verify_password(pw: str, hashed: str) -> bool:
+    return await _run_bcrypt(_crypt().verify, pw, hashed)
+
+
+def shutdown() -> None:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False, cancel_futures=True)
+            _EXECUTOR = None
+
+
+def stats() -> dict:
+    return {
+        "required": AUTH_REQUIRED,
+        "tokens": get_token_cache().stats(),
+        "bcrypt": {
+            "workers": BCRYPT_WORKERS,
+            "max_pending": BCRYPT_MAX_PENDING,
+            "pending": _pending,
+            "shed": _shed,
+        },
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Issue a service token.")
+    ap.add_argument("client", help="e.g. reminder-dispatcher")
+    ap.add_argument("--days", type=int, default=30)
+    args = ap.parse_args()
+    print(
+        create_token(
+            {"sub": args.client, "scope": SERVICE_SCOPE},
+            minutes=args.days * 24 * 60,
+        )
+    )
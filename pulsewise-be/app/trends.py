@@ -0,0 +1,171 @@
+"""Vital sign trends from ``vital_daily_rollups`` rows.
+
+Imported lazily by ``GET /diaries/trends`` so CRUD-only workers do not load
+NumPy. All window math runs on dense day-indexed arrays: days without
+readings are NaN/zero-count slots, so gaps need no special casing.
+"""
+from datetime import date, timedelta
+from typing import Sequence
+
+import numpy as np
+
+# output name -> rollup column prefix
+METRICS = {
+    "weight_kg": "weight",
+    "systolic": "systolic",
+    "diastolic": "diastolic",
+    "heart_rate": "hr",
+    "spo2": "spo2",
+}
+
+
+def lookback_days(windows: Sequence[int]) -> int:
+    """Days before ``date_from`` to load so the first day's windows (and
+    the weight change against ``w`` days earlier) are complete."""
+    return max(windows, default=0)
+
+
+def _mean(sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    out = np.full(sums.shape, np.nan)
+    np.divide(sums, counts, out=out, where=counts > 0)
+    return out
+
+
+def _window_sum(x: np.ndarray, w: int) -> np.ndarray:
+    # trailing w-day sums along the last axis; the first w-1 slots cover
+    # fewer days, which only ever fall in the lookback
+    c = np.cumsum(x, axis=-1)
+    out = c.copy()
+    out[..., w:] -= c[..., :-w]
+    return out
+
+
+def _ffill_index(valid: np.ndarray) -> np.ndarray:
+    # index of the latest valid slot at or before each slot (-1 if none)
+    idx = np.where(valid, np.arange(valid.size), -1)
+    return np.maximum.accumulate(idx)
+
+
+def _values(arr: np.ndarray, ndigits: int = 2) -> list:
+    return [None if np.isnan(v) else round(float(v), ndigits) for v in arr]
+
+
+def compute_trends(
+    rows: Sequence,
+    date_from: date,
+    date_to: date,
+    windows: Sequence[int] = (3, 7),
+    bucket: str = "day",
+) -> list[dict]:
+    """Per-day (with trailing ``windows``) or per-week aggregates for
+    ``date_from``..``date_to`` from rollup rows covering the lookback."""
+    start = date_from - timedelta(days=lookback_days(windows))
+    n = (date_to - start).days + 1
+    first = (date_from - start).days
+
+    keys = list(METRICS.values())
+    sums = np.zeros((len(keys), n))
+    counts = np.zeros((len(keys), n))
+    hr_min = np.full(n, np.nan)
+    readings = np.zeros(n, dtype=np.int64)
+    if rows:
+        idx = np.array([(r.diary_date - start).days for r in rows])
+        keep = (idx >= 0) & (idx < n)
+        idx = idx[keep]
+        rows = [r for r, k in zip(rows, keep) if k]
+        sums[:, idx] = np.array(
+            [[float(getattr(r, f"{k}_sum")) for k in keys] for r in rows]
+        ).T
+        counts[:, idx] = np.array(
+            [[getattr(r, f"{k}_n") for k in keys] for r in rows]
+        ).T
+        hr_min[idx] = np.array(
+            [np.nan if r.hr_min is None else r.hr_min for r in rows]
+        )
+        readings[idx] = [r.readings for r in rows]
+
+    if bucket == "week":
+        return _weekly(
+            date_from,
+            sums[:, first:],
+            counts[:, first:],
+            hr_min[first:],
+            readings[first:],
+        )
+
+    daily = _mean(sums, counts)
+    names = list(METRICS)
+    resting_valid = ~np.isnan(hr_min)
+    resting_vals = np.where(resting_valid, hr_min, 0.0)
+
+    weight = daily[names.index("weight_kg")]
+    weight_last = _ffill_index(~np.isnan(weight))
+    rolling = {}
+    for w in windows:
+        means = _mean(_window_sum(sums, w), _window_sum(counts, w))
+        resting = _mean(
+            _window_sum(resting_vals, w),
+            _window_sum(resting_valid.astype(float), w),
+        )
+        # today's weight vs the latest weight on or before w days ago
+        prev = np.full(n, -1)
+        prev[w:] = weight_last[:-w]
+        change = np.full(n, np.nan)
+        ok = prev >= 0
+        change[ok] = weight[ok] - weight[prev[ok]]
+        cols = {
+            "weight_change_kg": change,
+            "systolic": means[names.index("systolic")],
+            "diastolic": means[names.index("diastolic")],
+            "heart_rate": means[names.index("heart_rate")],
+            "resting_hr": resting,
+        }
+        rolling[f"{w}d"] = {k: _values(v[first:]) for k, v in cols.items()}
+
+    day_cols = {
+        name: _values(daily[i, first:]) for i, name in enumerate(names)
+    }
+    day_cols["resting_hr"] = _values(hr_min[first:], 0)
+    out = []
+    for i in range(n - first):
+        item = {
+            "date": date_from + timedelta(days=i),
+            "readings": int(readings[first + i]),
+        }
+        item.update({k: v[i] for k, v in day_cols.items()})
+        item["rolling"] = {
+            label: {k: v[i] for k, v in cols.items()}
+            for label, cols in rolling.items()
+        }
+        out.append(item)
+    return out
+
+
+def _weekly(date_from, sums, counts, hr_min, readings) -> list[dict]:
+    monday = date_from - timedelta(days=date_from.weekday())
+    offset = (date_from - monday).days
+    week = (np.arange(sums.shape[1]) + offset) // 7
+    n_weeks = int(week[-1]) + 1 if week.size else 0
+
+    def per_week(x):
+        return np.bincount(week, weights=x, minlength=n_weeks)
+
+    means = _mean(
+        np.array([per_week(s) for s in sums]),
+        np.array([per_week(c) for c in counts]),
+    )
+    valid = ~np.isnan(hr_min)
+    resting = _mean(
+        per_week(np.where(valid, hr_min, 0.0)), per_week(valid.astype(float))
+    )
+    cols = {name: _values(means[i]) for i, name in enumerate(METRICS)}
+    cols["resting_hr"] = _values(resting)
+    week_readings = per_week(readings.astype(float))
+    return [
+        {
+            "week_start": monday + timedelta(weeks=i),
+            "readings": int(week_readings[i]),
+            **{k: v[i] for k, v in cols.items()},
+        }
+        for i in range(n_weeks)
+    ]
@@ -0,0 +1,120 @@
+"""Helpers shared by the benchmark scripts in this directory."""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def metadata(**extra) -> dict:
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        **extra,
+    }
+
+
+def synthetic_signals(n: int, length: int, seed: int = 0) -> np.ndarray:
+    """Beat-like float32 signals: a sharp peak on a wandering baseline."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0.0, 1.0, length, dtype=np.float32)
+    centre = rng.uniform(0.3, 0.7, (n, 1)).astype(np.float32)
+    width = rng.uniform(0.01, 0.03, (n, 1)).astype(np.float32)
+    peak = np.exp(-((t - centre) ** 2) / (2 * width**2))
+    wander = 0.2 * np.sin(2 * np.pi * rng.uniform(0.2, 1.0, (n, 1)) * t)
+    noise = 0.05 * rng.standard_normal((n, length))
+    return (peak + wander + noise).astype(np.float32)
+
+
+def time_calls(
+    fn: Callable[[], object], repeat: int, warmup: int = 3
+) -> np.ndarray:
+    """Wall-clock milliseconds of ``repeat`` calls to ``fn``."""
+    for _ in range(warmup):
+        fn()
+    out = np.empty(repeat, dtype=np.float64)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out[i] = (time.perf_counter() - t0) * 1000.0
+    return out
+
+
+def summarize(times_ms: np.ndarray, items_per_call: int = 1) -> dict:
+    p50, p95, p99 = np.percentile(times_ms, [50, 95, 99]).tolist()
+    return {
+        "calls": int(times_ms.size),
+        "mean_ms": float(times_ms.mean()),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "items_per_s": items_per_call * 1000.0 / float(times_ms.mean()),
+    }
+
+
+def write_results(name: str, payload: dict, path: str | None = None) -> str:
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(
+            RESULTS_DIR, f"{name}-{payload['meta']['commit']}.json"
+        )
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def compare(
+    current: dict,
+    baseline_path: str,
+    key_fields: tuple[str, ...],
+    metric: str = "p50_ms",
+    tolerance: float = 0.15,
+) -> list[str]:
+    """Return a message for every case whose ``metric`` is more than
+    ``tolerance`` (fractional) worse than in the baseline results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(r: dict) -> tuple:
+        return tuple(r.get(k) for k in key_fields)
+
+    base = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = base.get(key(r))
+        if not b or not b.get(metric):
+            continue
+        ratio = r[metric] / b[metric]
+        if ratio > 1.0 + tolerance:
+            regressions.append(
+                f"{dict(zip(key_fields, key(r)))}: {metric} "
+                f"{b[metric]:.3f} -> {r[metric]:.3f} ({ratio:.2f}x)"
+            )
+    return regressions
@@ -0,0 +1,90 @@
+"""Vitals ingest throughput: one POST per reading vs the bulk endpoint.
+
+Needs a running API and an existing diary (rows are left in place):
+
+    python bench/bench_bulk_ingest.py --url http://localhost:8000 \
+        --diary-id <uuid> --token <access_token> --rows 500 \
+        --batch-sizes 50,500
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from _common import metadata, write_results
+
+
+def _readings(n: int) -> list[dict]:
+    start = datetime.now(timezone.utc)
+    return [
+        {
+            "measured_at": (start + timedelta(seconds=i)).isoformat(),
+            "heart_rate": 60 + i % 40,
+            "oxygen_saturation": 95 + i % 5,
+        }
+        for i in range(n)
+    ]
+
+
+def _result(mode: str, batch_size: int, rows: int, seconds: float) -> dict:
+    return {
+        "mode": mode,
+        "batch_size": batch_size,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_s": rows / seconds,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--diary-id", required=True)
+    ap.add_argument("--token", default="", help="from /auth/login")
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--batch-sizes", default="50,500")
+    ap.add_argument("--out")
+    args = ap.parse_args()
+
+    base = f"/diaries/{args.diary_id}/vitals"
+    results = []
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    with httpx.Client(
+        base_url=args.url, timeout=60, headers=headers
+    ) as client:
+        rows = _readings(args.rows)
+        t0 = time.perf_counter()
+        for row in rows:
+            client.post(base, json=row).raise_for_status()
+        elapsed = time.perf_counter() - t0
+        results.append(_result("single", 1, args.rows, elapsed))
+
+        for size in (int(b) for b in args.batch_sizes.split(",")):
+            rows = _readings(args.rows)
+            inserted = 0
+            t0 = time.perf_counter()
+            for i in range(0, len(rows), size):
+                r = client.post(f"{base}/bulk", json=rows[i : i + size])
+                r.raise_for_status()
+                inserted += r.json()["inserted"]
+            elapsed = time.perf_counter() - t0
+            if inserted != args.rows:
+                print(f"bulk {size}: only {inserted} rows inserted")
+                return 1
+            results.append(_result("bulk", size, args.rows, elapsed))
+
+    for r in results:
+        print(
+            f"{r['mode']:<6} batch={r['batch_size']:<5} "
+            f"{r['rows']} rows in {r['seconds']:.2f}s "
+            f"= {r['rows_per_s']:.0f} rows/s"
+        )
+    payload = {"meta": metadata(benchmark="bulk_ingest"), "results": results}
+    print(f"wrote {write_results('bulk_ingest', payload, args.out)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Concurrent load against a running API, to compare ``DB_ASYNC=1`` with
+``DB_ASYNC=0`` (start the server once per mode, same workers/pool):
+
+    DB_ASYNC=1 uvicorn app.main:app --port 8000 &
+    python bench/bench_crud.py --url http://localhost:8000 \
+        --path "/diaries?user_id=<uuid>" --token <access_token> \
+        --concurrency 64 --requests 5000
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from _common import metadata, summarize, write_results
+
+
+async def _worker(client, path, queue, times, errors):
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path)
+            if r.status_code >= 400:
+                errors.append(r.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        times.append((time.perf_counter() - t0) * 1000.0)
+
+
+async def run(
+    url: str, path: str, concurrency: int, requests: int, token: str = ""
+):
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+    times: list[float] = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(
+        base_url=url, limits=limits, headers=headers
+    ) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _worker(client, path, queue, times, errors)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - t0
+    return times, errors, elapsed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--path", required=True)
+    ap.add_argument("--token", default="", help="from /auth/login")
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--label", default="", help="e.g. async / sync")
+    ap.add_argument("--out")
+    args = ap.parse_args()
+
+    times, errors, elapsed = asyncio.run(
+        run(
+            args.url, args.path, args.concurrency, args.requests, args.token
+        )
+    )
+    stats = summarize(np.asarray(times))
+    stats.pop("items_per_s")
+    stats["requests_per_s"] = len(times) / elapsed
+    stats["errors"] = len(errors)
+    print(
+        f"{args.label or args.path}: c={args.concurrency} "
+        f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms "
+        f"{stats['requests_per_s']:.0f} req/s errors={len(errors)}"
+    )
+    payload = {
+        "meta": metadata(
+            benchmark="crud",
+            label=args.label,
+            path=args.path,
+            concurrency=args.concurrency,
+        ),
+        "results": [stats],
+    }
+    print(f"wrote {write_results('crud', payload, args.out)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""ECG inference benchmark: latency percentiles and throughput.
+
+Sweeps batch size, torch threads and normalization mode over synthetic
+187-sample signals, measuring ``predict_probs`` directly and the
+``/ecg/predict`` / ``/ecg/predict-batch`` routes through an in-process
+FastAPI test client (JSON and float32 bodies). Run from ``pulsewise-be``:
+
+    python bench/bench_ecg.py                      # full sweep
+    python bench/bench_ecg.py --quick --compare bench/results/ecg-abc123.json
+
+Results go to ``bench/results/ecg-<commit>.json``. With ``--compare`` the
+script exits 1 if any case's p50 regressed by more than ``--tolerance``.
+"""
+import argparse
+import json
+import os
+import sys
+
+from _common import (
+    compare,
+    metadata,
+    summarize,
+    synthetic_signals,
+    time_calls,
+    write_results,
+)
+
+KEY_FIELDS = ("target", "batch_size", "threads", "norm")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--batch-sizes", default="1,8,32,128,512")
+    ap.add_argument("--threads", default="1,2,4")
+    ap.add_argument("--norms", default="zscore,minmax,none")
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--quick", action="store_true", help="small sweep")
+    ap.add_argument(
+        "--no-app", action="store_true", help="skip the HTTP routes"
+    )
+    ap.add_argument(
+        "--cache", action="store_true", help="keep the result cache on"
+    )
+    ap.add_argument("--out", help="results file (default bench/results/)")
+    ap.add_argument("--compare", help="baseline results file")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+    if args.quick:
+        args.batch_sizes, args.threads, args.norms = "1,32", "1", "zscore"
+        args.repeat = min(args.repeat, 20)
+
+    # Settings must be in place before the app modules read them.
+    os.environ.setdefault("ECG_PRELOAD", "0")
+    os.environ.setdefault("ECG_BATCHING", "0")
+    os.environ["ECG_CACHE"] = "1" if args.cache else "0"
+
+    import torch
+
+    from app.ml.config import EXPECTED_LENGTH
+    from app.ml.ecgnet import get_model, predict_probs
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    threads = [int(t) for t in args.threads.split(",")]
+    norms = args.norms.split(",")
+    signals = synthetic_signals(max(batch_sizes), EXPECTED_LENGTH)
+    get_model()
+
+    client = None
+    if not args.no_app:
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        client = TestClient(app)
+
+    results = []
+
+    def record(target: str, n: int, t: int, norm: str, times) -> None:
+        row = {
+            "target": target,
+            "batch_size": n,
+            "threads": t,
+            "norm": norm,
+            **summarize(times, items_per_call=n),
+        }
+        row["signals_per_s"] = row.pop("items_per_s")
+        results.append(row)
+        print(
+            f"{target:<18} n={n:<4} threads={t} norm={norm:<6} "
+            f"p50={row['p50_ms']:.3f}ms p99={row['p99_ms']:.3f}ms "
+            f"{row['signals_per_s']:.0f} sig/s",
+            flush=True,
+        )
+
+    for t in threads:
+        torch.set_num_threads(t)
+        for norm in norms:
+            for n in batch_sizes:
+                x = signals[:n]
+                record(
+                    "predict_probs", n, t, norm,
+                    time_calls(lambda: predict_probs(x, norm), args.repeat),
+                )
+                if client is None:
+                    continue
+                if n == 1:
+                    path = "/ecg/predict"
+                    body = json.dumps({"signal": x[0].tolist(), "norm": norm})
+                else:
+                    path = "/ecg/predict-batch"
+                    body = json.dumps({"signals": x.tolist(), "norm": norm})
+                record(
+                    "http_json", n, t, norm,
+                    time_calls(
+                        lambda: client.post(
+                            path,
+                            content=body,
+                            headers={"content-type": "application/json"},
+                        ).raise_for_status(),
+                        args.repeat,
+                    ),
+                )
+                raw = x.tobytes()
+                record(
+                    "http_float32", n, t, norm,
+                    time_calls(
+                        lambda: client.post(
+                            f"{path}?norm={norm}",
+                            content=raw,
+                            headers={
+                                "content-type": "application/octet-stream",
+                                "accept": "application/octet-stream",
+                            },
+                        ).raise_for_status(),
+                        args.repeat,
+                    ),
+                )
+
+    payload = {
+        "meta": metadata(benchmark="ecg", torch=torch.__version__),
+        "results": results,
+    }
+    path = write_results("ecg", payload, args.out)
+    print(f"wrote {path}")
+
+    if args.compare:
+        regressions = compare(
+            payload, args.compare, KEY_FIELDS, tolerance=args.tolerance
+        )
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
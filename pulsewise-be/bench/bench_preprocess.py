@@ -0,0 +1,89 @@
+"""Preprocessing benchmark: per-row ``normalize_signal`` loop vs the batched
+``normalize_batch`` / ``preprocess`` path, per batch size and norm.
+
+    python bench/bench_preprocess.py [--quick] [--compare OLD.json]
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from _common import (
+    compare,
+    metadata,
+    summarize,
+    synthetic_signals,
+    time_calls,
+    write_results,
+)
+
+from app.ml.config import EXPECTED_LENGTH
+from app.ml.ecgnet import normalize_batch, normalize_signal, preprocess
+
+KEY_FIELDS = ("impl", "batch_size", "norm")
+
+
+def loop(signals: np.ndarray, norm: str) -> np.ndarray:
+    # the implementation used by to_input before normalize_batch
+    out = np.stack([normalize_signal(s, norm) for s in signals], axis=0)
+    return out.astype(np.float32)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--batch-sizes", default="1,8,32,128,512,4096")
+    ap.add_argument("--norms", default="zscore,minmax")
+    ap.add_argument("--baseline-window", type=int, default=65)
+    ap.add_argument("--repeat", type=int, default=100)
+    ap.add_argument("--quick", action="store_true")
+    ap.add_argument("--out")
+    ap.add_argument("--compare")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+    if args.quick:
+        args.batch_sizes, args.repeat = "1,32,512", min(args.repeat, 20)
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    signals = synthetic_signals(max(batch_sizes), EXPECTED_LENGTH)
+    results = []
+    for norm in args.norms.split(","):
+        for n in batch_sizes:
+            x = signals[:n]
+            buf = np.empty_like(x)
+            cases = {
+                "loop": lambda: loop(x, norm),
+                "batched": lambda: normalize_batch(x, norm),
+                "batched_out": lambda: normalize_batch(x, norm, out=buf),
+                "batched_baseline": lambda: preprocess(
+                    x, norm, baseline_window=args.baseline_window, out=buf
+                ),
+            }
+            for impl, fn in cases.items():
+                row = {
+                    "impl": impl,
+                    "batch_size": n,
+                    "norm": norm,
+                    **summarize(time_calls(fn, args.repeat), n),
+                }
+                results.append(row)
+                print(
+                    f"{impl:<17} n={n:<5} norm={norm:<6} "
+                    f"p50={row['p50_ms']:.4f}ms "
+                    f"{row['items_per_s']:.0f} sig/s",
+                    flush=True,
+                )
+
+    payload = {"meta": metadata(benchmark="preprocess"), "results": results}
+    print(f"wrote {write_results('preprocess', payload, args.out)}")
+    if args.compare:
+        regressions = compare(
+            payload, args.compare, KEY_FIELDS, tolerance=args.tolerance
+        )
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""Response serialization benchmark: hand-built ``list[dict]`` rows vs typed
+``from_attributes`` models, per 1k rows.
+
+    python bench/bench_serialization.py [--quick] [--compare OLD.json]
+
+Implementations, all starting from ORM rows:
+  dict_jsonable    dicts built per row, ``jsonable_encoder`` + ``json.dumps``
+                   (FastAPI's generic path, e.g. with a custom response class)
+  dict_dump_json   dicts built per row, validated as ``list[dict]`` and dumped
+                   by Pydantic (the old ``response_model=list[dict]`` routes)
+  model_dump_json  rows validated into the ``*Out`` models and dumped by
+                   Pydantic (the current routes)
+  dict_orjson      dicts built per row + ``orjson.dumps``; reference only,
+                   skipped when orjson is not installed
+
+and, loading the rows from an in-memory SQLite table first:
+  load_entity_dict     ``select(Model)`` + per-row dicts + ``list[dict]`` dump
+                       (the old list routes)
+  load_columns_model   ``select(*columns(Model, Out))`` rows validated into
+                       the ``*Out`` model (the current list routes)
+"""
+import argparse
+import json
+import sys
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from _common import compare, metadata, summarize, time_calls, write_results
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models import DailyActivity, HeartDiary, Medication, MedicationLog
+from app.schemas import ActivityOut, MedicationLogOut, MedicationOut, columns
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+KEY_FIELDS = ("dataset", "impl", "rows")
+
+
+def _meds(n: int) -> list:
+    user = uuid.uuid4()
+    return [
+        Medication(
+            medication_id=uuid.uuid4(),
+            user_id=user,
+            name=f"med {i}",
+            description="Loop diuretic, take in the morning",
+            condition_tag="heart_failure",
+            dosage_amount=Decimal("40.000"),
+            dosage_unit="mg",
+            route="oral",
+            active=True,
+            start_date=date(2026, 1, 1),
+            end_date=None,
+        )
+        for i in range(n)
+    ]
+
+
+def _logs(n: int) -> list:
+    t0 = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+    med = uuid.uuid4()
+    return [
+        MedicationLog(
+            medication_log_id=uuid.uuid4(),
+            medication_id=med,
+            schedule_id=uuid.uuid4(),
+            planned_at=t0 + timedelta(hours=i),
+            taken_at=t0 + timedelta(hours=i, minutes=5),
+            taken=True,
+            notes=None,
+        )
+        for i in range(n)
+    ]
+
+
+def _activities(n: int) -> list:
+    t0 = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+    diary = uuid.uuid4()
+    return [
+        DailyActivity(
+            activity_id=uuid.uuid4(),
+            diary_id=diary,
+            name="walk",
+            duration_min=30,
+            heart_rate=92,
+            user_feeling="good",
+            note="around the block",
+            occurred_at=t0 + timedelta(minutes=i),
+        )
+        for i in range(n)
+    ]
+
+
+# the per-row dicts the routers built before the *Out models
+def _med_dict(r) -> dict:
+    return {
+        "medication_id": r.medication_id,
+        "user_id": r.user_id,
+        "name": r.name,
+        "description": r.description,
+        "condition_tag": r.condition_tag,
+        "dosage_amount": (
+            float(r.dosage_amount) if r.dosage_amount is not None else None
+        ),
+        "dosage_unit": r.dosage_unit,
+        "route": r.route,
+        "active": r.active,
+        "start_date": r.start_date,
+        "end_date": r.end_date,
+    }
+
+
+def _log_dict(r) -> dict:
+    return {
+        "medication_log_id": r.medication_log_id,
+        "schedule_id": r.schedule_id,
+        "planned_at": r.planned_at,
+        "taken_at": r.taken_at,
+        "taken": r.taken,
+        "notes": r.notes,
+    }
+
+
+def _activity_dict(r) -> dict:
+    return {
+        "activity_id": r.activity_id,
+        "name": r.name,
+        "duration_min": r.duration_min,
+        "heart_rate": r.heart_rate,
+        "user_feeling": r.user_feeling,
+        "note": r.note,
+        "occurred_at": r.occurred_at,
+    }
+
+
+DATASETS = {
+    "medications": (Medication, _meds, _med_dict, MedicationOut),
+    "medication_logs": (MedicationLog, _logs, _log_dict, MedicationLogOut),
+    "activities": (DailyActivity, _activities, _activity_dict, ActivityOut),
+}
+TABLES = [m.__table__ for m in (HeartDiary, Medication, MedicationLog)] + [
+    DailyActivity.__table__
+]
+DICTS = TypeAdapter(list[dict])
+
+
+def _cases(model, rows: list, to_dict, out) -> dict:
+    typed = TypeAdapter(list[out])
+
+    def dict_jsonable():
+        return json.dumps(
+            jsonable_encoder([to_dict(r) for r in rows]),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode()
+
+    def dicts_json(items) -> bytes:
+        return DICTS.dump_json(
+            DICTS.validate_python([to_dict(r) for r in items])
+        )
+
+    def dict_dump_json():
+        return dicts_json(rows)
+
+    def model_dump_json():
+        return typed.dump_json(
+            typed.validate_python(rows, from_attributes=True)
+        )
+
+    cases = {
+        "dict_jsonable": dict_jsonable,
+        "dict_dump_json": dict_dump_json,
+        "model_dump_json": model_dump_json,
+    }
+    if orjson is not None:
+        cases["dict_orjson"] = lambda: orjson.dumps(
+            [to_dict(r) for r in rows]
+        )
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=TABLES)
+    with Session(engine, expire_on_commit=False) as s:
+        s.add_all(rows)
+        s.commit()
+
+    def load_entity_dict():
+        with Session(engine) as s:
+            loaded = s.scalars(select(model)).all()
+            return dicts_json(loaded)
+
+    def load_columns_model():
+        with Session(engine) as s:
+            loaded = s.execute(select(*columns(model, out))).all()
+            return typed.dump_json(
+                typed.validate_python(loaded, from_attributes=True)
+            )
+
+    cases["load_entity_dict"] = load_entity_dict
+    cases["load_columns_model"] = load_columns_model
+    return cases
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", default="100,1000,10000")
+    ap.add_argument("--datasets", default=",".join(DATASETS))
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--quick", action="store_true")
+    ap.add_argument("--out")
+    ap.add_argument("--compare")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    args = ap.parse_args()
+    if args.quick:
+        args.rows, args.repeat = "1000", min(args.repeat, 10)
+
+    results = []
+    for name in args.datasets.split(","):
+        model, make, to_dict, out = DATASETS[name]
+        for n in (int(r) for r in args.rows.split(",")):
+            cases = _cases(model, make(n), to_dict, out)
+            for impl, fn in cases.items():
+                row = {
+                    "dataset": name,
+                    "impl": impl,
+                    "rows": n,
+                    "bytes": len(fn()),
+                    **summarize(time_calls(fn, args.repeat), n),
+                }
+                row["ms_per_1k_rows"] = row["mean_ms"] * 1000.0 / n
+                results.append(row)
+                print(
+                    f"{name:<16} {impl:<18} rows={n:<6} "
+                    f"p50={row['p50_ms']:.3f}ms "
+                    f"{row['ms_per_1k_rows']:.3f} ms/1k rows",
+                    flush=True,
+                )
+
+    payload = {
+        "meta": metadata(
+            benchmark="serialization",
+            orjson=orjson.__version__ if orjson is not None else None,
+        ),
+        "results": results,
+    }
+    print(f"wrote {write_results('serialization', payload, args.out)}")
+    if args.compare:
+        regressions = compare(
+            payload, args.compare, KEY_FIELDS, tolerance=args.tolerance
+        )
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
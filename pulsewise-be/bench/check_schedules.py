@@ -0,0 +1,90 @@
+"""Check that reminders stay within the medication's dates.
+
+``app.schedules`` (``/medications/upcoming``, ``/due``, ``/due/claim`` and
+the stored ``next_fire_at``) must agree with ``adherence.planned_doses``:
+no doses before a medication's ``start_date``, after its ``end_date`` or
+while it is inactive. Pure Python, no database; exits 1 on a mismatch.
+
+    python bench/check_schedules.py
+"""
+
+import os
+import sys
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import schedules  # noqa: E402
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+TODAY = NOW.date()
+
+
+def _schedule(**kw) -> SimpleNamespace:
+    fields = {
+        "schedule_id": 1,
+        "time_of_day": time(8, 0),
+        "days_of_week": None,
+        "timezone": "UTC",
+        "as_needed": False,
+        "interval_days": 1,
+        "remind_offset_min": 0,
+        "start_date": None,
+        "end_date": None,
+        "created_at": NOW - timedelta(days=30),
+    }
+    return SimpleNamespace(**{**fields, **kw})
+
+
+def _med(**kw) -> SimpleNamespace:
+    fields = {"active": True, "start_date": None, "end_date": None}
+    return SimpleNamespace(**{**fields, **kw})
+
+
+def _first_day(sc, med) -> date | None:
+    fire = schedules.next_fire_at(sc, NOW, med)
+    return None if fire is None else fire.date()
+
+
+def main() -> int:
+    sc = _schedule()
+    week = NOW + timedelta(days=7)
+    ended = _med(end_date=TODAY - timedelta(days=1))
+    checks = {
+        "ended: no next_fire_at": _first_day(sc, ended) is None,
+        "ended: no doses this week": not list(
+            schedules.doses(sc, NOW, week, ended)
+        ),
+        "ended: expand is empty": not schedules.expand(
+            [sc], NOW, week, meds=[ended]
+        ),
+        "ends today: last dose is today": [
+            d.date() for d in schedules.doses(
+                sc, NOW - timedelta(days=2), week, _med(end_date=TODAY)
+            )
+        ] == [TODAY - timedelta(days=1), TODAY],
+        "inactive: no next_fire_at": (
+            _first_day(sc, _med(active=False)) is None
+        ),
+        "not started: first dose on start_date": _first_day(
+            sc, _med(start_date=TODAY + timedelta(days=3))
+        ) == TODAY + timedelta(days=3),
+        "no dates: fires tomorrow": _first_day(sc, _med())
+        == TODAY + timedelta(days=1),
+        # every other day still counts from the schedule's own start
+        "every 2 days: anchored on the schedule": _first_day(
+            _schedule(interval_days=2, start_date=TODAY),
+            _med(start_date=TODAY + timedelta(days=3)),
+        ) == TODAY + timedelta(days=4),
+    }
+    failed = [name for name, ok in checks.items() if not ok]
+    for name, ok in checks.items():
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
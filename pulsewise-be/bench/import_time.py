@@ -0,0 +1,93 @@
+"""Import-time / memory guard for the API process.
+
+Imports ``app.main`` in fresh interpreters and fails (exit 1) when a
+CRUD-only worker (``ECG_ROUTES=0``) pulls in torch/NumPy or exceeds the
+time/RSS budget. Run from ``pulsewise-be``:
+
+    python bench/import_time.py --max-ms 1000 --max-rss-mb 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import app.main  # noqa: F401
+elapsed = (time.perf_counter() - t0) * 1000.0
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_ms": elapsed,
+    "max_rss_mb": rss_kb / 1024.0,
+    "torch": "torch" in sys.modules,
+    "numpy": "numpy" in sys.modules,
+}))
+"""
+
+HEAVY = ("torch", "numpy")
+
+
+def measure(ecg_routes: str, runs: int) -> dict:
+    env = dict(os.environ, ECG_ROUTES=ecg_routes, ECG_PRELOAD="0")
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "ecg_routes": ecg_routes,
+        # noise on a shared machine only adds time, so the best run is
+        # the closest to the real cost
+        "import_ms": min(s["import_ms"] for s in samples),
+        "max_rss_mb": statistics.median(s["max_rss_mb"] for s in samples),
+        "torch": samples[-1]["torch"],
+        "numpy": samples[-1]["numpy"],
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--max-ms", type=float, default=1000.0)
+    ap.add_argument("--max-rss-mb", type=float, default=150.0)
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    crud = measure("0", args.runs)
+    full = measure("1", args.runs)
+    results = {"crud": crud, "with_ecg": full}
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = []
+    for mod in HEAVY:
+        if crud[mod]:
+            failures.append(f"ECG_ROUTES=0 imported {mod}")
+    if full["torch"]:
+        failures.append("ECG_ROUTES=1 imported torch before first use")
+    if crud["import_ms"] > args.max_ms:
+        failures.append(
+            f"import took {crud['import_ms']:.0f} ms > {args.max_ms:.0f} ms"
+        )
+    if crud["max_rss_mb"] > args.max_rss_mb:
+        failures.append(
+            f"RSS {crud['max_rss_mb']:.0f} MB > {args.max_rss_mb:.0f} MB"
+        )
+    for f in failures:
+        print(f"FAIL: {f}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
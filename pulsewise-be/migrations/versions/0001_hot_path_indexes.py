@@ -0,0 +1,70 @@
+"""Indexes for the foreign keys and sort orders the routers query on
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns)
+INDEXES = [
+    (
+        "ix_vital_signs_diary_measured",
+        "vital_signs",
+        ["diary_id", sa.text("measured_at DESC")],
+    ),
+    ("ix_daily_activities_diary", "daily_activities", ["diary_id"]),
+    ("ix_daily_consumptions_diary", "daily_consumptions", ["diary_id"]),
+    ("ix_diary_symptoms_diary", "diary_symptoms", ["diary_id"]),
+    ("ix_medications_user", "medications", ["user_id"]),
+    (
+        "ix_medication_schedules_medication",
+        "medication_schedules",
+        ["medication_id"],
+    ),
+    (
+        "ix_medication_logs_medication_taken",
+        "medication_logs",
+        ["medication_id", sa.text("taken_at DESC")],
+    ),
+    (
+        "ix_education_sections_module_order",
+        "education_sections",
+        ["module_id", "order"],
+    ),
+]
+
+
+# CONCURRENTLY cannot run inside a transaction, and builds without locking
+# out writes. If a build fails it leaves an INVALID index behind: drop it
+# before re-running, since IF NOT EXISTS would skip it.
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,119 @@
+"""Extend list indexes with the id tie-breaker used by keyset pagination
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (new name, table, columns, index it supersedes)
+# heart_diaries needs none: uq_diary (user_id, diary_date) is already unique
+# per user, so the seek on (diary_date, diary_id) stays on that index.
+INDEXES = [
+    (
+        "ix_vital_signs_diary_measured_id",
+        "vital_signs",
+        ["diary_id", sa.text("measured_at DESC"), sa.text("vital_id DESC")],
+        "ix_vital_signs_diary_measured",
+    ),
+    (
+        "ix_daily_activities_diary_occurred",
+        "daily_activities",
+        [
+            "diary_id",
+            sa.text("occurred_at DESC"),
+            sa.text("activity_id DESC"),
+        ],
+        "ix_daily_activities_diary",
+    ),
+    (
+        "ix_daily_consumptions_diary_occurred",
+        "daily_consumptions",
+        [
+            "diary_id",
+            sa.text("occurred_at DESC"),
+            sa.text("consumption_id DESC"),
+        ],
+        "ix_daily_consumptions_diary",
+    ),
+    (
+        "ix_diary_symptoms_diary_occurred",
+        "diary_symptoms",
+        [
+            "diary_id",
+            sa.text("occurred_at DESC"),
+            sa.text("symptom_id DESC"),
+        ],
+        "ix_diary_symptoms_diary",
+    ),
+    (
+        "ix_medication_logs_medication_taken_id",
+        "medication_logs",
+        [
+            "medication_id",
+            sa.text("taken_at DESC"),
+            sa.text("medication_log_id DESC"),
+        ],
+        "ix_medication_logs_medication_taken",
+    ),
+]
+
+# columns of the superseded indexes, to restore them on downgrade
+PREVIOUS = {
+    "ix_vital_signs_diary_measured": [
+        "diary_id",
+        sa.text("measured_at DESC"),
+    ],
+    "ix_daily_activities_diary": ["diary_id"],
+    "ix_daily_consumptions_diary": ["diary_id"],
+    "ix_diary_symptoms_diary": ["diary_id"],
+    "ix_medication_logs_medication_taken": [
+        "medication_id",
+        sa.text("taken_at DESC"),
+    ],
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, old in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                old,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, old in reversed(INDEXES):
+            op.create_index(
+                old,
+                table,
+                PREVIOUS[old],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,145 @@
+"""Per-diary (per-day) vital sign rollups maintained by triggers
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Sums and counts (not averages) so every insert/update/delete of a vital
+# is an O(1) delta on its diary's row. Only hr_min cannot be un-applied;
+# deleting the current minimum re-reads the min of that one diary.
+CREATE_TABLE = """
+CREATE TABLE vital_daily_rollups (
+  diary_id       UUID PRIMARY KEY
+                 REFERENCES heart_diaries(diary_id) ON DELETE CASCADE,
+  user_id        UUID NOT NULL,
+  diary_date     DATE NOT NULL,
+  readings       INT NOT NULL DEFAULT 0,
+  weight_sum     NUMERIC NOT NULL DEFAULT 0,
+  weight_n       INT NOT NULL DEFAULT 0,
+  systolic_sum   BIGINT NOT NULL DEFAULT 0,
+  systolic_n     INT NOT NULL DEFAULT 0,
+  diastolic_sum  BIGINT NOT NULL DEFAULT 0,
+  diastolic_n    INT NOT NULL DEFAULT 0,
+  hr_sum         BIGINT NOT NULL DEFAULT 0,
+  hr_n           INT NOT NULL DEFAULT 0,
+  hr_min         INT,
+  spo2_sum       BIGINT NOT NULL DEFAULT 0,
+  spo2_n         INT NOT NULL DEFAULT 0,
+  updated_at     timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX ix_vital_daily_rollups_user_date
+  ON vital_daily_rollups (user_id, diary_date);
+"""
+
+CREATE_FUNCTIONS = """
+CREATE FUNCTION vital_rollup_apply(p_diary UUID, s INT, v vital_signs)
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO vital_daily_rollups AS r (
+    diary_id, user_id, diary_date, readings,
+    weight_sum, weight_n, systolic_sum, systolic_n,
+    diastolic_sum, diastolic_n, hr_sum, hr_n, hr_min, spo2_sum, spo2_n
+  )
+  SELECT
+    d.diary_id, d.user_id, d.diary_date, s,
+    s * COALESCE(v.weight_kg, 0), s * (v.weight_kg IS NOT NULL)::int,
+    s * COALESCE(v.systolic, 0), s * (v.systolic IS NOT NULL)::int,
+    s * COALESCE(v.diastolic, 0), s * (v.diastolic IS NOT NULL)::int,
+    s * COALESCE(v.heart_rate, 0), s * (v.heart_rate IS NOT NULL)::int,
+    CASE WHEN s > 0 THEN v.heart_rate END,
+    s * COALESCE(v.oxygen_saturation, 0),
+    s * (v.oxygen_saturation IS NOT NULL)::int
+  FROM heart_diaries d
+  WHERE d.diary_id = p_diary
+  ON CONFLICT (diary_id) DO UPDATE SET
+    readings = r.readings + EXCLUDED.readings,
+    weight_sum = r.weight_sum + EXCLUDED.weight_sum,
+    weight_n = r.weight_n + EXCLUDED.weight_n,
+    systolic_sum = r.systolic_sum + EXCLUDED.systolic_sum,
+    systolic_n = r.systolic_n + EXCLUDED.systolic_n,
+    diastolic_sum = r.diastolic_sum + EXCLUDED.diastolic_sum,
+    diastolic_n = r.diastolic_n + EXCLUDED.diastolic_n,
+    hr_sum = r.hr_sum + EXCLUDED.hr_sum,
+    hr_n = r.hr_n + EXCLUDED.hr_n,
+    hr_min = CASE WHEN s > 0 THEN LEAST(r.hr_min, EXCLUDED.hr_min)
+                  ELSE r.hr_min END,
+    spo2_sum = r.spo2_sum + EXCLUDED.spo2_sum,
+    spo2_n = r.spo2_n + EXCLUDED.spo2_n,
+    updated_at = now();
+
+  IF s < 0 THEN
+    DELETE FROM vital_daily_rollups
+    WHERE diary_id = p_diary AND readings <= 0;
+    IF v.heart_rate IS NOT NULL THEN
+      UPDATE vital_daily_rollups
+      SET hr_min = (
+        SELECT min(heart_rate) FROM vital_signs WHERE diary_id = p_diary
+      )
+      WHERE diary_id = p_diary AND hr_min >= v.heart_rate;
+    END IF;
+  END IF;
+END $$;
+
+CREATE FUNCTION vital_rollup_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM vital_rollup_apply(OLD.diary_id, -1, OLD);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM vital_rollup_apply(NEW.diary_id, 1, NEW);
+  END IF;
+  RETURN NULL;
+END $$;
+
+CREATE TRIGGER vital_signs_rollup
+AFTER INSERT OR UPDATE OR DELETE ON vital_signs
+FOR EACH ROW EXECUTE FUNCTION vital_rollup_trigger();
+"""
+
+# Runs in the migration's transaction after the trigger exists; the lock
+# keeps writes from landing between the backfill and the trigger.
+BACKFILL = """
+LOCK TABLE vital_signs IN SHARE ROW EXCLUSIVE MODE;
+INSERT INTO vital_daily_rollups (
+  diary_id, user_id, diary_date, readings,
+  weight_sum, weight_n, systolic_sum, systolic_n,
+  diastolic_sum, diastolic_n, hr_sum, hr_n, hr_min, spo2_sum, spo2_n
+)
+SELECT
+  d.diary_id, d.user_id, d.diary_date, count(*),
+  COALESCE(sum(v.weight_kg), 0), count(v.weight_kg),
+  COALESCE(sum(v.systolic), 0), count(v.systolic),
+  COALESCE(sum(v.diastolic), 0), count(v.diastolic),
+  COALESCE(sum(v.heart_rate), 0), count(v.heart_rate), min(v.heart_rate),
+  COALESCE(sum(v.oxygen_saturation), 0), count(v.oxygen_saturation)
+FROM vital_signs v
+JOIN heart_diaries d ON d.diary_id = v.diary_id
+GROUP BY d.diary_id, d.user_id, d.diary_date;
+"""
+
+
+def upgrade() -> None:
+    op.execute(CREATE_TABLE)
+    op.execute(CREATE_FUNCTIONS)
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS vital_signs_rollup ON vital_signs")
+    op.execute("DROP FUNCTION IF EXISTS vital_rollup_trigger()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS vital_rollup_apply(UUID, INT, vital_signs)"
+    )
+    op.execute("DROP TABLE IF EXISTS vital_daily_rollups")
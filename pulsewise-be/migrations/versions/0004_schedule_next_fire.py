@@ -0,0 +1,164 @@
+"""medication_schedules.next_fire_at with a partial index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, Optional, Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "ix_medication_schedules_next_fire"
+BATCH = 1000
+# column default of medication_schedules.timezone
+DEFAULT_TZ = "Asia/Jakarta"
+
+schedules = sa.table(
+    "medication_schedules",
+    sa.column("schedule_id", sa.Uuid),
+    sa.column("medication_id", sa.Uuid),
+    sa.column("time_of_day", sa.Time),
+    sa.column("days_of_week", sa.ARRAY(sa.Integer)),
+    sa.column("timezone", sa.Text),
+    sa.column("as_needed", sa.Boolean),
+    sa.column("interval_days", sa.Integer),
+    sa.column("remind_offset_min", sa.Integer),
+    sa.column("start_date", sa.Date),
+    sa.column("end_date", sa.Date),
+    sa.column("created_at", sa.TIMESTAMP(timezone=True)),
+    sa.column("next_fire_at", sa.TIMESTAMP(timezone=True)),
+)
+medications = sa.table(
+    "medications",
+    sa.column("medication_id", sa.Uuid),
+    sa.column("active", sa.Boolean),
+    sa.column("start_date", sa.Date),
+    sa.column("end_date", sa.Date),
+)
+
+
+# The recurrence rules as of this revision, copied rather than imported
+# from app.schedules so that what the backfill writes does not change
+# with the application code.
+
+
+def _bound(a: Optional[date], b: Optional[date], pick) -> Optional[date]:
+    return a if b is None else b if a is None else pick(a, b)
+
+
+def _days(r, tz: ZoneInfo, first: date) -> Iterator[date]:
+    step = max(r.interval_days or 1, 1)
+    start = _bound(r.start_date, r.med_start_date, max)
+    end = _bound(r.end_date, r.med_end_date, min)
+    weekdays = set(r.days_of_week) if r.days_of_week else None
+    day = first if start is None else max(first, start)
+    if step > 1:
+        created = r.created_at or datetime.now(timezone.utc)
+        anchor = r.start_date or created.astimezone(tz).date()
+        day += timedelta(days=-(day - anchor).days % step)
+    misses = 0
+    while end is None or day <= end:
+        if weekdays is None or day.isoweekday() in weekdays:
+            misses = 0
+            yield day
+        else:
+            misses += 1
+            if misses == 7:
+                return
+        day += timedelta(days=step)
+
+
+def _next_fire(r, after: datetime) -> Optional[datetime]:
+    if not r.med_active or r.time_of_day is None:
+        return None
+    delta = timedelta(minutes=r.remind_offset_min or 0)
+    start = after - delta
+    tz = ZoneInfo(r.timezone or DEFAULT_TZ)
+    at = r.time_of_day.replace(tzinfo=None)
+    for day in _days(r, tz, start.astimezone(tz).date()):
+        planned = datetime.combine(day, at, tzinfo=tz).astimezone(
+            timezone.utc
+        )
+        if planned >= start and planned + delta > after:
+            return planned + delta
+    return None
+
+
+def _backfill() -> None:
+    # Recurrence is evaluated in Python (_next_fire), so this needs a live
+    # connection; with --sql the column is left NULL for those rows.
+    if op.get_context().as_sql:
+        return
+    conn = op.get_bind()
+    now = datetime.now(timezone.utc)
+    last = None
+    while True:
+        stmt = (
+            sa.select(
+                schedules,
+                medications.c.active.label("med_active"),
+                medications.c.start_date.label("med_start_date"),
+                medications.c.end_date.label("med_end_date"),
+            )
+            .join(
+                medications,
+                medications.c.medication_id == schedules.c.medication_id,
+            )
+            .where(schedules.c.as_needed.is_(False))
+            .order_by(schedules.c.schedule_id)
+            .limit(BATCH)
+        )
+        if last is not None:
+            stmt = stmt.where(schedules.c.schedule_id > last)
+        rows = conn.execute(stmt).all()
+        if not rows:
+            return
+        params = [
+            {"sid": r.schedule_id, "fire": _next_fire(r, now)} for r in rows
+        ]
+        conn.execute(
+            schedules.update()
+            .where(schedules.c.schedule_id == sa.bindparam("sid"))
+            .values(next_fire_at=sa.bindparam("fire")),
+            params,
+        )
+        last = rows[-1].schedule_id
+
+
+def upgrade() -> None:
+    # nullable without a default: a catalog-only change
+    op.add_column(
+        "medication_schedules",
+        sa.Column("next_fire_at", sa.TIMESTAMP(timezone=True)),
+    )
+    _backfill()
+    # Finished schedules and PRN ones stay NULL and out of the index.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX,
+            "medication_schedules",
+            ["next_fire_at"],
+            postgresql_where=sa.text("next_fire_at IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX,
+            table_name="medication_schedules",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("medication_schedules", "next_fire_at")
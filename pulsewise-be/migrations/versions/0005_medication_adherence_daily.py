@@ -0,0 +1,123 @@
+"""Per-medication, per-day adherence counters maintained by triggers
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# One row per medication and local day (the schedule's time zone, else the
+# medication_schedules.timezone default) of planned_at, or of taken_at for
+# unscheduled logs. Planned doses are not stored: the API expands them from
+# the schedules and reports missed = planned - (on_time + late + skipped).
+CREATE_TABLE = """
+CREATE TABLE medication_adherence_daily (
+  medication_id  UUID NOT NULL
+                 REFERENCES medications(medication_id) ON DELETE CASCADE,
+  day            DATE NOT NULL,
+  on_time        INT NOT NULL DEFAULT 0,
+  late           INT NOT NULL DEFAULT 0,
+  skipped        INT NOT NULL DEFAULT 0,
+  unscheduled    INT NOT NULL DEFAULT 0,
+  updated_at     timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (medication_id, day)
+);
+"""
+
+# "On time" = taken no later than 60 minutes after planned_at; keep in sync
+# with app.adherence.ON_TIME_MIN.
+CREATE_FUNCTIONS = """
+CREATE FUNCTION adherence_apply(s INT, l medication_logs)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+  tz TEXT;
+  in_window BOOLEAN := l.taken_at <= l.planned_at + interval '60 minutes';
+BEGIN
+  SELECT timezone INTO tz
+  FROM medication_schedules WHERE schedule_id = l.schedule_id;
+  INSERT INTO medication_adherence_daily AS a (
+    medication_id, day, on_time, late, skipped, unscheduled
+  ) VALUES (
+    l.medication_id,
+    (COALESCE(l.planned_at, l.taken_at)
+       AT TIME ZONE COALESCE(tz, 'Asia/Jakarta'))::date,
+    s * (l.planned_at IS NOT NULL AND l.taken AND in_window)::int,
+    s * (l.planned_at IS NOT NULL AND l.taken AND NOT in_window)::int,
+    s * (l.planned_at IS NOT NULL AND NOT l.taken)::int,
+    s * (l.planned_at IS NULL)::int
+  )
+  ON CONFLICT (medication_id, day) DO UPDATE SET
+    on_time = a.on_time + EXCLUDED.on_time,
+    late = a.late + EXCLUDED.late,
+    skipped = a.skipped + EXCLUDED.skipped,
+    unscheduled = a.unscheduled + EXCLUDED.unscheduled,
+    updated_at = now();
+END $$;
+
+CREATE FUNCTION adherence_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM adherence_apply(-1, OLD);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM adherence_apply(1, NEW);
+  END IF;
+  RETURN NULL;
+END $$;
+
+-- Not on schedule_id: ON DELETE SET NULL from a deleted schedule must not
+-- re-file the log under the default time zone.
+CREATE TRIGGER medication_logs_adherence
+AFTER INSERT OR DELETE OR UPDATE OF medication_id, planned_at, taken_at, taken
+ON medication_logs
+FOR EACH ROW EXECUTE FUNCTION adherence_trigger();
+"""
+
+# Runs in the migration's transaction after the trigger exists; the lock
+# keeps writes from landing between the backfill and the trigger.
+BACKFILL = """
+LOCK TABLE medication_logs IN SHARE ROW EXCLUSIVE MODE;
+INSERT INTO medication_adherence_daily (
+  medication_id, day, on_time, late, skipped, unscheduled
+)
+SELECT
+  l.medication_id,
+  (COALESCE(l.planned_at, l.taken_at)
+     AT TIME ZONE COALESCE(s.timezone, 'Asia/Jakarta'))::date AS day,
+  count(*) FILTER (WHERE l.planned_at IS NOT NULL AND l.taken
+                   AND l.taken_at <= l.planned_at + interval '60 minutes'),
+  count(*) FILTER (WHERE l.planned_at IS NOT NULL AND l.taken
+                   AND l.taken_at > l.planned_at + interval '60 minutes'),
+  count(*) FILTER (WHERE l.planned_at IS NOT NULL AND NOT l.taken),
+  count(*) FILTER (WHERE l.planned_at IS NULL)
+FROM medication_logs l
+LEFT JOIN medication_schedules s ON s.schedule_id = l.schedule_id
+GROUP BY 1, 2;
+"""
+
+
+def upgrade() -> None:
+    op.execute(CREATE_TABLE)
+    op.execute(CREATE_FUNCTIONS)
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP TRIGGER IF EXISTS medication_logs_adherence ON medication_logs"
+    )
+    op.execute("DROP FUNCTION IF EXISTS adherence_trigger()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS adherence_apply(INT, medication_logs)"
+    )
+    op.execute("DROP TABLE IF EXISTS medication_adherence_daily")
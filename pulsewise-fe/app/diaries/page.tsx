@@ -17,6 +17,7 @@ import {
   CardTitle,
 } from "../../components/ui/card";
 import { Input } from "../../components/ui/input";
+import { api } from "../../lib/api";
 
 type Diary = {
   diary_id: string;
@@ -34,8 +35,6 @@ type Vital = {
   weight_kg?: number | null;
 };
 
-const API = (p: string) => `${process.env.NEXT_PUBLIC_API_BASE}${p}`;
-
 export default function DiariesPage() {
   const [userId, setUserId] = useState("");
   const [date, setDate] = useState("");
@@ -57,7 +56,7 @@ export default function DiariesPage() {
     setSelected(null);
     setVitals([]);
     try {
-      const res = await fetch(API(`/diaries?user_id=${uid}`), {
+      const res = await api(`/diaries?user_id=${uid}`, {
         cache: "no-store",
       });
       const data = await res.json();
@@ -73,9 +72,8 @@ export default function DiariesPage() {
   async function createDiary() {
     if (!userId || !date) return alert("User ID & Date are required.");
     try {
-      const res = await fetch(API(`/diaries`), {
+      const res = await api(`/diaries`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ user_id: userId, diary_date: date, notes }),
       });
       if (!res.ok) {
@@ -93,7 +91,7 @@ export default function DiariesPage() {
     setSelected(d);
     setIsLoadingVitals(true);
     try {
-      const res = await fetch(API(`/diaries/${d.diary_id}/vitals`));
+      const res = await api(`/diaries/${d.diary_id}/vitals`);
       setVitals(await res.json());
     } catch (error) {
       console.error("Failed to load vitals:", error);
@@ -106,9 +104,8 @@ export default function DiariesPage() {
   async function addVital() {
     if (!selected) return;
     try {
-      const res = await fetch(API(`/diaries/${selected.diary_id}/vitals`), {
+      const res = await api(`/diaries/${selected.diary_id}/vitals`, {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           measured_at: new Date().toISOString(),
           systolic: systolic ? Number(systolic) : undefined,